@@ -1,105 +1,192 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Header
+from fastapi import APIRouter, UploadFile, File, HTTPException, Header, WebSocket, WebSocketDisconnect
 from services.speech_service import speech_service
-from services.gemini_service import gemini_service
+from services.conversation_pipeline import conversation_pipeline, UnrecognizedAudioError
+from services.audio_ingestion import audio_ingestion, AudioRejectedError
+from api.dependencies import identify_user
 from services.elevenlabs_service import elevenlabs_service
-from services.pronunciation_service import pronunciation_service
-from middleware.auth_middleware import get_current_user_from_token
-from fastapi.responses import JSONResponse
-import base64
+from services.turn_events import turn_events, TurnCompleted
+from database.models import UserModel
+from fastapi.responses import StreamingResponse
+from core.serialization import ORJSONResponse, dumps
+import asyncio
+import json
 
 router = APIRouter()
 
 
+def _publish_turn(run, user: UserModel, personality: str):
+    # History, progress, gamification and creating the user on first sight
+    # are all written by the background pipeline
+    response = run["response"]
+    turn_events.publish(TurnCompleted(
+        user_id=user.firebase_uid,
+        user=user,
+        transcript=response["transcript"],
+        analysis=response["analysis"],
+        pronunciation_score=response["pronunciation"]["score"],
+        problematic_phonemes=response["pronunciation"]["problematic_phonemes"],
+        word_confidences=run["stt"]["word_confidences"],
+        word_timings=run["stt"].get("word_timings", []),
+        phoneme_scores=response["pronunciation"]["phoneme_scores"],
+        personality=personality
+    ))
+
+
 @router.post("/conversation/audio")
 async def process_audio_conversation(
     file: UploadFile = File(...),
     personality: str = "friendly",
     user_level: str = "intermediate",
     voice_id: str = None,
+    response_mode: str = "base64",
     user_id: str = None,  # Will be None for unauthenticated, populated by middleware if authenticated
     authorization: str = Header(None)
 ):
     """
-    Simplified: Audio Input -> STT -> Pronunciation -> Gemini -> TTS -> Output
-    Supports both authenticated and unauthenticated users
+    Audio Input -> STT -> (Pronunciation -> prefix TTS || Gemini -> reply TTS) -> Output
+    Supports both authenticated and unauthenticated users.
+    Per-stage timings are returned in "timings" and the Server-Timing header.
+
+    response_mode=base64 (default) embeds the reply MP3 as audio_base64.
+    response_mode=stream skips TTS here and returns an audio_url that streams
+    the MP3 while it is being synthesized.
     """
-    
-    # Try to get authenticated user, fallback to demo if not authenticated
-    if authorization:
-        try:
-            user_id = await get_current_user_from_token(authorization)
-        except:
-            user_id = "demo_user"
-    else:
-        user_id = "demo_user"
+    if response_mode not in ("base64", "stream"):
+        raise HTTPException(status_code=400, detail="response_mode must be 'base64' or 'stream'")
+
+    # Token verification doesn't depend on the audio, so it overlaps with the pipeline
+    user_task = asyncio.create_task(identify_user(authorization))
     
     try:
-        # 1. Read Audio
-        audio_content = await file.read()
-        
-        # 2. Transcribe (STT) with word-level confidence scores
-        speech_result = await speech_service.transcribe_audio(audio_content)
-        transcript = speech_result["transcript"]
-        word_confidences = speech_result["word_confidences"]
-        
-        if not transcript:
-             return JSONResponse(status_code=400, content={"message": "Could not recognize audio"})
-
-        # 3. Pronunciation Analysis
-        pronunciation_score = pronunciation_service.calculate_pronunciation_score(word_confidences)
-        problematic_phonemes = pronunciation_service.identify_problematic_phonemes(word_confidences)
-        pronunciation_feedback = pronunciation_service.generate_pronunciation_feedback(
-            pronunciation_score, 
-            problematic_phonemes
-        )
-        
-        # 4. Analyze with Gemini
-        analysis = await gemini_service.analyze_language(
-            transcript, 
+        audio = await audio_ingestion.ingest(file)
+        run = await conversation_pipeline.process_audio(
+            audio.content,
+            personality=personality,
             user_level=user_level,
-            personality=personality
+            voice_id=voice_id,
+            stream_audio=response_mode == "stream",
+            audio_digest=audio.digest
         )
         
-        # 5. Generate Response Audio (TTS)
-        ai_response_parts = []
-        
-        if pronunciation_score >= 85:
-            ai_response_parts.append("Great pronunciation!")
-        elif pronunciation_score < 65:
-            ai_response_parts.append(pronunciation_feedback)
-        
-        ai_response_parts.append(analysis.get("learning_tip", ""))
-        ai_response_parts.append(analysis.get("follow_up_question", ""))
-        
-        ai_response_text = " ".join(filter(None, ai_response_parts))
-        
-        try:
-            # Use provided voice_id or default logic handles it if None is passed
-            generate_args = {}
-            if voice_id:
-                generate_args["voice_id"] = voice_id
-                
-            audio_bytes = await elevenlabs_service.generate_audio(ai_response_text, **generate_args)
-            audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-        except Exception as e:
-            print(f"TTS Generation failed: {e}")
-            audio_base64 = None
-        
-        # 6. Return response
-        return {
-            "transcript": transcript,
-            "analysis": analysis,
-            "pronunciation": {
-                "score": pronunciation_score,
-                "feedback": pronunciation_feedback,
-                "problematic_phonemes": problematic_phonemes,
-            },
-            "audio_base64": audio_base64,
-            "user_id": user_id  # Include for debugging
-        }
+        result = run["response"]
+        user = await user_task
+        result["user_id"] = user.firebase_uid  # Include for debugging
+        result["timings"] = run.report()
+        _publish_turn(run, user, personality)
+        return ORJSONResponse(result, headers={"Server-Timing": run.server_timing()})
         
+    except AudioRejectedError as e:
+        user_task.cancel()
+        return ORJSONResponse(status_code=e.status_code, content={"message": str(e)})
+    except UnrecognizedAudioError:
+        user_task.cancel()
+        return ORJSONResponse(status_code=400, content={"message": "Could not recognize audio"})
     except Exception as e:
+        user_task.cancel()
         import traceback
         traceback.print_exc()
         print(f"Error processing conversation: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/conversation/audio/{stream_id}")
+async def stream_response_audio(stream_id: str):
+    """
+    Streams the tutor's reply audio (MP3) for a turn processed with response_mode=stream
+    """
+    if not elevenlabs_service.has_stream(stream_id):
+        raise HTTPException(status_code=404, detail="Audio stream not found or expired")
+    return StreamingResponse(elevenlabs_service.stream_audio(stream_id), media_type="audio/mpeg")
+
+
+async def _receive_turn_audio(websocket: WebSocket, state: dict):
+    """
+    Yields binary audio frames until the client ends the turn with an
+    "end" text message (plain or {"type": "end"}) or disconnects.
+    """
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            state["disconnected"] = True
+            return
+        if message.get("bytes"):
+            yield message["bytes"]
+        elif message.get("text"):
+            text = message["text"]
+            try:
+                text = json.loads(text).get("type", text)
+            except (ValueError, AttributeError):
+                pass
+            if text == "end":
+                return
+
+
+@router.websocket("/conversation/stream")
+async def stream_conversation(
+    websocket: WebSocket,
+    personality: str = "friendly",
+    user_level: str = "intermediate",
+    voice_id: str = None,
+    response_mode: str = "base64",
+    token: str = None  # Browsers can't set headers on WebSockets, so the Firebase token comes as a query param
+):
+    """
+    Streaming: Opus frames -> streaming STT (interim/final transcripts pushed live)
+    -> the conversation pipeline (without its STT stage) for the final turn.
+
+    Client messages: binary audio frames, then "end" to finish the turn.
+    Server messages (JSON): {"type": "interim"|"final", "transcript"},
+    then {"type": "turn", ...same body as /conversation/audio}.
+    The socket stays open for further turns.
+    """
+    await websocket.accept()
+    user = await identify_user(f"Bearer {token}" if token else None)
+    state = {"disconnected": False}
+
+    try:
+        while not state["disconnected"]:
+            transcript_parts = []
+            word_confidences = []
+            word_timings = []
+
+            async for result in speech_service.stream_transcribe(_receive_turn_audio(websocket, state)):
+                if state["disconnected"]:
+                    break
+                if result["is_final"]:
+                    transcript_parts.append(result["transcript"])
+                    word_confidences.extend(result["word_confidences"])
+                    word_timings.extend(result["word_timings"])
+                await websocket.send_json({
+                    "type": "final" if result["is_final"] else "interim",
+                    "transcript": result["transcript"]
+                })
+
+            if state["disconnected"]:
+                break
+
+            transcript = "".join(transcript_parts).strip()
+            if not transcript:
+                await websocket.send_json({"type": "error", "message": "Could not recognize audio"})
+                continue
+
+            run = await conversation_pipeline.process_transcript(
+                transcript,
+                word_confidences,
+                personality=personality,
+                user_level=user_level,
+                voice_id=voice_id,
+                stream_audio=response_mode == "stream",
+                word_timings=word_timings
+            )
+            result = run["response"]
+            result["user_id"] = user.firebase_uid
+            result["timings"] = run.report()
+            await websocket.send_text(dumps({"type": "turn", **result}).decode())
+            _publish_turn(run, user, personality)
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        print(f"Error in streaming conversation: {e}")
+        await websocket.close(code=1011, reason=str(e)[:120])
@@ -0,0 +1,71 @@
+from typing import Optional
+from fastapi import Header
+from core.cache import LRUSet
+from core.config import settings
+from database.models import UserModel
+from database.repositories import UserRepository
+from middleware.auth_middleware import verify_id_token
+
+DEMO_USER_ID = "demo_user_123"
+
+# Users already provisioned by this process - checked before touching Mongo
+_known_users = LRUSet(maxsize=settings.KNOWN_USERS_CACHE_SIZE)
+
+
+async def provision_user(user: UserModel):
+    """
+    Creates the user document on first sight. A failure is logged and retried
+    on the user's next request rather than failing this one.
+    """
+    if user.firebase_uid in _known_users:
+        return
+    try:
+        await UserRepository.ensure_user(user)
+    except Exception as e:
+        print(f"Error provisioning user {user.firebase_uid}: {e}")
+        return
+    _known_users.add(user.firebase_uid)
+
+
+async def identify_user(authorization: Optional[str] = None) -> UserModel:
+    """
+    The caller's profile from their Firebase token, or the demo user when
+    there is no valid token. Doesn't touch the database.
+    """
+    claims = None
+    if authorization:
+        token = authorization[len("Bearer "):] if authorization.startswith("Bearer ") else authorization
+        try:
+            claims = await verify_id_token(token)
+        except Exception:
+            claims = None
+
+    if claims is None:
+        return UserModel(
+            firebase_uid=DEMO_USER_ID,
+            email="demo@languagetutor.com",
+            display_name="Demo User",
+            level="intermediate",
+        )
+    return UserModel(
+        firebase_uid=claims["uid"],
+        email=claims.get("email") or "",
+        display_name=claims.get("name"),
+    )
+
+
+async def resolve_user_id(authorization: Optional[str] = None) -> str:
+    """
+    Firebase UID of the caller (see identify_user), with the user document
+    created on first sight so reads keyed by this id find it.
+    """
+    user = await identify_user(authorization)
+    await provision_user(user)
+    return user.firebase_uid
+
+
+async def get_current_user_id(authorization: str = Header(None)) -> str:
+    """
+    Get current user ID - the same identity the conversation routes record turns under.
+    """
+    return await resolve_user_id(authorization)
@@ -3,53 +3,37 @@ from database.repositories import (
     AchievementRepository, LeaderboardRepository, 
     UserRepository, ProgressRepository
 )
+from api.dependencies import get_current_user_id
+from database.models import AchievementView, ProgressStatsView, UserStatsView
+from core.serialization import ORJSONResponse
 from typing import Optional
 
 router = APIRouter()
 
 
-async def get_current_user_id():
-    """Get current user ID - creates demo user if doesn't exist"""
-    user_id = "demo_user_123"
-    
-    # Check if user exists, create if not
-    from database.models import UserModel
-    user = await UserRepository.get_user_by_firebase_uid(user_id)
-    if not user:
-        # Create demo user
-        demo_user = UserModel(
-            firebase_uid=user_id,
-            email="demo@languagetutor.com",
-            display_name="Demo User",
-            level="intermediate",
-        )
-        await UserRepository.create_user(demo_user)
-    
-    return user_id
-
-
 @router.get("/gamification/stats")
 async def get_user_stats(user_id: str = Depends(get_current_user_id)):
     """
     Get comprehensive user statistics including progress, streaks, and achievements
     """
     try:
-        user = await UserRepository.get_user_by_firebase_uid(user_id)
+        user = await UserRepository.get_user_by_firebase_uid(user_id, UserStatsView)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        progress = await ProgressRepository.get_or_create_progress(user_id)
-        achievements = await AchievementRepository.get_user_achievements(user_id)
-        rank = await LeaderboardRepository.get_user_rank(user_id)
+        progress = await ProgressRepository.get_or_create_progress(user_id, ProgressStatsView)
+        achievements = await AchievementRepository.get_user_achievements(user_id, AchievementView)
+        standing = await LeaderboardRepository.get_user_standing(user_id) or {}
         
-        return {
+        return ORJSONResponse({
             "user": {
                 "display_name": user.display_name or "Anonymous",
                 "level": user.level,
                 "total_points": user.total_points,
                 "current_streak": user.current_streak,
                 "longest_streak": user.longest_streak,
-                "rank": rank
+                "rank": standing.get("rank"),
+                "percentile": standing.get("percentile")
             },
             "progress": {
                 "total_conversations": progress.total_conversations,
@@ -62,10 +46,10 @@ async def get_user_stats(user_id: str = Depends(get_current_user_id)):
                     "title": ach.title,
                     "description": ach.description,
                     "icon": ach.icon,
-                    "earned_at": ach.earned_at.isoformat()
+                    "earned_at": ach.earned_at
                 } for ach in achievements
             ]
-        }
+        })
     except HTTPException:
         raise
     except Exception as e:
@@ -81,13 +65,9 @@ async def get_leaderboard(
     Get global or filtered leaderboard
     """
     try:
-        leaderboard = await LeaderboardRepository.get_global_leaderboard(limit)
-        
-        # Filter by country if specified
-        if country:
-            leaderboard = [entry for entry in leaderboard if entry.country == country]
+        leaderboard = await LeaderboardRepository.get_global_leaderboard(limit, country=country)
         
-        return {
+        return ORJSONResponse({
             "leaderboard": [
                 {
                     "rank": entry.rank,
@@ -96,7 +76,7 @@ async def get_leaderboard(
                     "current_streak": entry.current_streak
                 } for entry in leaderboard
             ]
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -2,30 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from database.repositories import UserRepository
 from database.models import PersonalityProfile
+from api.dependencies import get_current_user_id
 
 router = APIRouter()
 
 
-async def get_current_user_id():
-    """Get current user ID - creates demo user if doesn't exist"""
-    user_id = "demo_user_123"
-    
-    # Check if user exists, create if not
-    from database.models import UserModel
-    user = await UserRepository.get_user_by_firebase_uid(user_id)
-    if not user:
-        # Create demo user
-        demo_user = UserModel(
-            firebase_uid=user_id,
-            email="demo@languagetutor.com",
-            display_name="Demo User",
-            level="intermediate",
-        )
-        await UserRepository.create_user(demo_user)
-    
-    return user_id
-
-
 # Pre-defined AI tutor personalities
 PERSONALITIES = {
     "friendly": PersonalityProfile(
@@ -1,15 +1,28 @@
-from fastapi import APIRouter, HTTPException
-from services.elevenlabs_service import elevenlabs_service
+from fastapi import APIRouter, HTTPException, Header, Response
+from core.serialization import ORJSONResponse
+from services.voice_catalog import voice_catalog
 
 router = APIRouter()
 
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
 @router.get("/voices")
-async def get_available_voices():
+async def get_available_voices(if_none_match: str = Header(None)):
     """
     Get list of available voices from ElevenLabs.
+    Served from the in-process voice catalog; supports ETag / If-None-Match.
     """
     try:
-        voices = elevenlabs_service.get_voices()
-        return {"voices": voices}
+        voices, etag = await voice_catalog.get()
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        return ORJSONResponse({"voices": voices}, headers=headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,125 @@
+"""
+Benchmark: MongoDB round trips per turn for achievement checks.
+
+Compares the previous flow (one find_one + insert_one per qualifying
+achievement, each followed by its own increment_points, points added even
+for achievements already earned) with the rule engine in
+GamificationService.check_and_award_achievements (earned set loaded once,
+rules evaluated in memory, one insert_many and one increment_points).
+
+Every command sent to the server is counted with a pymongo CommandListener.
+Needs a reachable MongoDB (MONGODB_URI); the synthetic users are removed
+afterwards.
+
+Run from the backend directory:
+    python -m benchmarks.bench_achievement_round_trips --turns 50
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from core.config import settings
+from database.mongo import db
+from database.indexes import ensure_indexes
+from database.models import AchievementModel, UserModel
+from database.repositories import AchievementRepository, ProgressRepository, UserRepository
+from services.gamification_service import gamification_service
+
+USER_PREFIX = "bench_achievements_"
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.commands = Counter()
+
+    def started(self, event):
+        if event.command_name not in ("hello", "isMaster", "ping", "endSessions"):
+            self.commands[event.command_name] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def reset(self):
+        self.commands.clear()
+
+
+async def legacy_check_and_award(user_id: str, conversation_data: dict):
+    """The previous check_and_award_achievements, kept here for comparison"""
+    achievements = gamification_service.ACHIEVEMENTS
+    progress = await ProgressRepository.get_or_create_progress(user_id)
+    user = await UserRepository.get_user_by_firebase_uid(user_id)
+    if not user:
+        return
+
+    qualifying = []
+    if progress.total_conversations == 1:
+        qualifying.append("first_conversation")
+    if progress.total_conversations == 10:
+        qualifying.append("ten_conversations")
+    elif progress.total_conversations == 50:
+        qualifying.append("fifty_conversations")
+    elif progress.total_conversations == 100:
+        qualifying.append("hundred_conversations")
+    if conversation_data.get("pronunciation_score", 0) >= 90:
+        qualifying.append("pronunciation_master")
+    if conversation_data.get("error_count", 0) == 0:
+        qualifying.append("error_free")
+    if user.current_streak == 7:
+        qualifying.append("week_streak")
+    elif user.current_streak == 30:
+        qualifying.append("month_streak")
+
+    for achievement_type in qualifying:
+        await AchievementRepository.award_achievement(AchievementModel(
+            user_id=user_id, achievement_type=achievement_type, **achievements[achievement_type]
+        ))
+        await UserRepository.increment_points(user_id, achievements[achievement_type]["points"])
+
+
+async def run_turns(label: str, check, counter: CommandCounter, user_id: str, turns: int):
+    database = db.get_db()
+    await UserRepository.create_user(UserModel(firebase_uid=user_id, email=f"{user_id}@example.com", current_streak=7))
+    await database.progress.insert_one({"user_id": user_id, "total_conversations": 0})
+
+    commands = Counter()
+    elapsed = 0.0
+    for turn in range(turns):
+        # The conversation count is bumped by record_turns, outside of the check
+        await database.progress.update_one({"user_id": user_id}, {"$set": {"total_conversations": turn + 1}})
+        counter.reset()
+        start = time.perf_counter()
+        await check(user_id, {"pronunciation_score": 92, "error_count": 0})
+        elapsed += time.perf_counter() - start
+        commands.update(counter.commands)
+
+    user = await database.users.find_one({"firebase_uid": user_id})
+    print(f"{label:12s} {sum(commands.values()) / turns:8.2f} round trips/turn "
+          f"{elapsed / turns * 1000:8.2f} ms/turn   points {user['total_points']:5d}   {dict(commands)}")
+
+
+async def main(turns: int):
+    counter = CommandCounter()
+    db.client = AsyncIOMotorClient(settings.MONGODB_URI, event_listeners=[counter])
+    database = db.get_db()
+    await ensure_indexes(database)
+
+    try:
+        await run_turns("legacy", legacy_check_and_award, counter, USER_PREFIX + "legacy", turns)
+        await run_turns("rule engine", gamification_service.check_and_award_achievements, counter, USER_PREFIX + "rules", turns)
+    finally:
+        for collection in ("users", "progress", "achievements"):
+            field = "firebase_uid" if collection == "users" else "user_id"
+            await database[collection].delete_many({field: {"$regex": f"^{USER_PREFIX}"}})
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.turns))
@@ -0,0 +1,129 @@
+"""
+Benchmark: N concurrent /api/v1/conversation/audio requests vs. a single one.
+
+The upstream SDK clients are replaced with fakes that block their thread for a
+fixed time (like a real network call would), so the numbers only measure how
+well the route overlaps the upstream waits. Every request sends different
+audio and gets a different transcript and reply, so the STT and Gemini
+caches never answer one request from another, and the TTS cache is disabled.
+
+Run from the backend directory:
+    python -m benchmarks.bench_concurrent_audio --requests 8
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import threading
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+os.environ.setdefault("ELEVENLABS_API_KEY", "bench")
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+
+# Avoid needing Google credentials just to construct the (replaced) client
+from google.cloud import speech
+speech.SpeechClient = lambda *args, **kwargs: None
+
+import httpx
+from main import app
+from services.speech_service import speech_service
+from services.gemini_service import gemini_service
+from services.elevenlabs_service import elevenlabs_service
+from services.audio_cache import TTSAudioCache
+from database.repositories import UserRepository
+
+STT_LATENCY = 0.30
+GEMINI_LATENCY = 0.50
+TTS_LATENCY = 0.40
+
+_uploads = itertools.count()
+_turns = itertools.count()
+_replies = itertools.count()
+_counter_lock = threading.Lock()
+
+
+def _fake_recognize(config, audio):
+    time.sleep(STT_LATENCY)
+    with _counter_lock:
+        turn = next(_turns)
+    transcript = f"Hello there number {turn}"
+    words = [
+        SimpleNamespace(
+            word=word,
+            confidence=0.92,
+            start_time=timedelta(seconds=0.4 * i),
+            end_time=timedelta(seconds=0.4 * i + 0.3)
+        ) for i, word in enumerate(transcript.split())
+    ]
+    alternative = SimpleNamespace(transcript=transcript, words=words, confidence=0.92)
+    return SimpleNamespace(results=[SimpleNamespace(alternatives=[alternative])])
+
+
+def _fake_generate_content(prompt):
+    time.sleep(GEMINI_LATENCY)
+    with _counter_lock:
+        reply = next(_replies)
+    # A different follow-up question per call, so each reply's TTS is different too
+    return SimpleNamespace(text='{"corrected_sentence": "Hello there", "errors": [], '
+                                '"learning_tip": "Nice greeting!", '
+                                f'"follow_up_question": "How was practice number {reply}?"}}')
+
+
+async def _fake_ensure_user(user):
+    return False
+
+
+def _fake_convert(text, voice_id, model_id, **kwargs):
+    time.sleep(TTS_LATENCY)
+    yield b"\xff\xfb" * 1024
+
+
+def install_fakes():
+    speech_service.client = SimpleNamespace(recognize=_fake_recognize)
+    gemini_service.model = SimpleNamespace(generate_content=_fake_generate_content)
+    elevenlabs_service.client = SimpleNamespace(
+        text_to_speech=SimpleNamespace(convert=_fake_convert)
+    )
+    # The pronunciation prefix phrases repeat, and the disk tier outlives a run: no TTS cache at all
+    elevenlabs_service.audio_cache = TTSAudioCache(memory_max_bytes=0, disk_dir=None, disk_max_bytes=0)
+    # No MongoDB needed: without the lifespan, turn events are only queued and users are never written
+    UserRepository.ensure_user = staticmethod(_fake_ensure_user)
+
+
+async def post_audio(client: httpx.AsyncClient):
+    # Unique bytes per upload, so the STT cache (keyed by audio digest) misses
+    audio = b"\x1a\x45\xdf\xa3" + b"\x00" * 4096 + next(_uploads).to_bytes(8, "big")
+    files = {"file": ("audio.webm", audio, "audio/webm")}
+    response = await client.post("/api/v1/conversation/audio", files=files)
+    response.raise_for_status()
+
+
+async def timed(coro_factory, count: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(coro_factory() for _ in range(count)))
+    return time.perf_counter() - start
+
+
+async def main(count: int):
+    install_fakes()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await post_audio(client)  # warm up
+
+        single = await timed(lambda: post_audio(client), 1)
+        concurrent = await timed(lambda: post_audio(client), count)
+
+    print(f"Upstream latency per request: {STT_LATENCY + GEMINI_LATENCY + TTS_LATENCY:.2f}s")
+    print(f"1 request:            {single:.3f}s")
+    print(f"{count} concurrent requests: {concurrent:.3f}s")
+    print(f"Serialized would be:  {single * count:.3f}s")
+    print(f"Ratio concurrent/single: {concurrent / single:.2f}x (1.0x is ideal)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,87 @@
+"""
+Benchmark: the in-process leaderboard index at 1M synthetic users.
+
+Measures the bulk build, incremental point updates (as done by
+UserRepository.increment_points) and global / per-country top-N reads,
+and compares top-N against sorting all users on every call (what a
+full-collection sort does).
+
+Run from the backend directory:
+    python -m benchmarks.bench_leaderboard --users 1000000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from database.leaderboard import LeaderboardIndex
+
+COUNTRIES = ["US", "PK", "IN", "GB", "BR", "DE", "NG", "MX", "JP", "FR"]
+
+
+def synthetic_users(count: int):
+    rng = random.Random(42)
+    for i in range(count):
+        yield {
+            "firebase_uid": f"user_{i:07d}",
+            "display_name": f"Learner {i}",
+            "total_points": int(rng.paretovariate(1.2) * 10),
+            "current_streak": rng.randint(0, 30),
+            "settings": {"country": rng.choice(COUNTRIES)}
+        }
+
+
+def timed(label: str, func, repeat: int = 1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    per_call = (time.perf_counter() - start) / repeat
+    unit, value = ("ms", per_call * 1000) if per_call >= 0.001 else ("µs", per_call * 1e6)
+    print(f"{label:45s} {value:10.2f} {unit}")
+
+
+def main(count: int):
+    users = list(synthetic_users(count))
+    index = LeaderboardIndex()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    states = {
+        u["firebase_uid"]: (u["total_points"], u["current_streak"], u["display_name"], u["settings"]["country"], None)
+        for u in users
+    }
+    index._users = states
+    index._partitions = LeaderboardIndex._build_partitions(states)
+    index.loaded = True
+    build_seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{'bulk build (' + str(count) + ' users)':45s} {build_seconds * 1000:10.2f} ms   peak {peak / 2**20:.0f} MiB")
+
+    rng = random.Random(7)
+    user_ids = [u["firebase_uid"] for u in users]
+
+    def update():
+        user_id = rng.choice(user_ids)
+        index.update_points(user_id, index._users[user_id][0] + rng.randint(1, 50))
+
+    timed("increment_points index update", update, repeat=100000)
+    timed("top 100 global", lambda: index.top(100), repeat=10000)
+    timed("top 100 per country", lambda: index.top(100, rng.choice(COUNTRIES)), repeat=10000)
+    timed("top 1000 global", lambda: index.top(1000), repeat=1000)
+    timed("rank + percentile", lambda: index.standing(rng.choice(user_ids)), repeat=100000)
+    timed("rank + percentile per country", lambda: index.standing(rng.choice(user_ids), "US"), repeat=100000)
+
+    def update_then_rank():
+        update()
+        index.standing(rng.choice(user_ids))
+
+    timed("point update + rank (offsets recomputed)", update_then_rank, repeat=20000)
+    timed("baseline: count users with more points", lambda: sum(1 for u in users if u["total_points"] > 100), repeat=3)
+    timed("baseline: full sort then top 100", lambda: sorted(users, key=lambda u: -u["total_points"])[:100], repeat=3)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    args = parser.parse_args()
+    main(args.users)
@@ -0,0 +1,147 @@
+"""
+Benchmark: per-read CPU and allocations for the documents behind /gamification/stats.
+
+Each read decodes the BSON the driver would receive and builds the model.
+Compares whole documents validated into the full models against the view
+models the stats endpoint reads (UserStatsView, ProgressStatsView,
+AchievementView), validated from their projections. No database needed:
+documents are synthetic, shaped like ours. Allocations are what a read's
+result keeps alive.
+
+Run from the backend directory:
+    python -m benchmarks.bench_model_views --reads 20000
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+import bson
+from bson import ObjectId
+from database.models import (
+    AchievementModel, AchievementView, ProgressStatsView, ProgressTrackingModel, UserModel, UserStatsView
+)
+from database.repositories import _projection
+from services.gamification_service import GamificationService
+
+PHONEMES = ["TH", "R", "L", "V", "W", "AE", "IH", "EH", "NG", "SH", "ZH", "CH", "JH", "ER", "UH"]
+
+
+def user_document():
+    return {
+        "_id": ObjectId(),
+        "firebase_uid": "user_0000001",
+        "email": "learner@example.com",
+        "display_name": "Learner",
+        "level": "intermediate",
+        "target_language": "en-US",
+        "preferred_personality": "friendly",
+        "total_points": 1840,
+        "current_streak": 12,
+        "longest_streak": 31,
+        "last_practice_date": datetime.utcnow(),
+        "streak_last_day": 20000,
+        "streak_days": (1 << 12) - 1,
+        "created_at": datetime.utcnow() - timedelta(days=200),
+        "settings": {"country": "PK", "age_group": "18-24", "voice_id": "21m00Tcm4TlvDq8ikWAM"}
+    }
+
+
+def progress_document():
+    now = datetime.utcnow()
+    return {
+        "_id": ObjectId(),
+        "user_id": "user_0000001",
+        "pronunciation_progress": {
+            phoneme: {
+                "phoneme": phoneme,
+                "scores": [70.0 + i % 25 for i in range(20)],
+                "count": 120, "total": 9600.0, "total_sq": 780000.0, "ema": 81.5,
+                "last_practice_date": now,
+                "improvement_percentage": 6.5
+            } for phoneme in PHONEMES
+        },
+        "overall_pronunciation_score": 81.2,
+        "common_errors": {"grammar": 40, "vocabulary": 12, "tense": 9},
+        "recent_improvements": ["TH", "R"],
+        "total_conversations": 240,
+        "total_practice_time_minutes": 610.0,
+        "average_session_duration": 150.0,
+        "updated_at": now
+    }
+
+
+def achievement_documents():
+    return [
+        {"_id": ObjectId(), "user_id": "user_0000001", "achievement_type": achievement_type,
+         "earned_at": datetime.utcnow(), "metadata": None, **definition}
+        for achievement_type, definition in GamificationService.ACHIEVEMENTS.items()
+    ]
+
+
+def project(document, view):
+    return {field: document[field] for field in _projection(view) if field in document}
+
+
+def validated(model, raw: bytes):
+    document = bson.decode(raw)
+    document["_id"] = str(document["_id"])
+    return model.model_validate(document)
+
+
+def view(model, raw: bytes):
+    return model.model_validate(bson.decode(raw))
+
+
+def measure(label: str, read, reads: int, size: int):
+    start = time.perf_counter()
+    for _ in range(reads):
+        read()
+    cpu_us = (time.perf_counter() - start) / reads * 1e6
+
+    tracemalloc.start()
+    kept = [read() for _ in range(100)]
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    print(f"{label:45s} {cpu_us:9.1f} µs/read   {retained / 100 / 1024:6.1f} KiB kept/read   {size:6d} BSON bytes")
+
+
+def main(reads: int):
+    user, progress, achievements = user_document(), progress_document(), achievement_documents()
+    raw_user, raw_progress = bson.encode(user), bson.encode(progress)
+    raw_achievements = [bson.encode(a) for a in achievements]
+    user_projected = bson.encode(project(user, UserStatsView))
+    progress_projected = bson.encode(project(progress, ProgressStatsView))
+    achievements_projected = [bson.encode(project(a, AchievementView)) for a in achievements]
+    achievement_bytes = sum(map(len, raw_achievements))
+    achievement_projected_bytes = sum(map(len, achievements_projected))
+
+    cases = [
+        ("user: validate whole document", lambda: validated(UserModel, raw_user), len(raw_user)),
+        ("user: UserStatsView of projection", lambda: view(UserStatsView, user_projected), len(user_projected)),
+        ("progress: validate whole document", lambda: validated(ProgressTrackingModel, raw_progress), len(raw_progress)),
+        ("progress: ProgressStatsView of projection",
+         lambda: view(ProgressStatsView, progress_projected), len(progress_projected)),
+        ("achievements: validate whole documents",
+         lambda: [validated(AchievementModel, raw) for raw in raw_achievements], achievement_bytes),
+        ("achievements: AchievementView of projection",
+         lambda: [view(AchievementView, raw) for raw in achievements_projected], achievement_projected_bytes),
+        ("/gamification/stats reads: whole documents", lambda: (
+            validated(UserModel, raw_user), validated(ProgressTrackingModel, raw_progress),
+            [validated(AchievementModel, raw) for raw in raw_achievements]
+        ), len(raw_user) + len(raw_progress) + achievement_bytes),
+        ("/gamification/stats reads: view models", lambda: (
+            view(UserStatsView, user_projected),
+            view(ProgressStatsView, progress_projected),
+            [view(AchievementView, raw) for raw in achievements_projected]
+        ), len(user_projected) + len(progress_projected) + achievement_projected_bytes),
+    ]
+    for label, read, size in cases:
+        measure(label, read, reads, size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reads", type=int, default=20000)
+    args = parser.parse_args()
+    main(args.reads)
@@ -0,0 +1,96 @@
+"""
+Benchmark: problematic-phoneme detection throughput on a large transcript corpus.
+
+Compares the previous substring scan (every low-confidence word against
+every example word of every phoneme) with the phonetics subsystem: lexicon
+lookups without the word cache, then with it (the steady state, since
+transcripts reuse a small vocabulary). The corpus draws words from the
+lexicon (in random rank order) with a Zipf-like distribution; every word counts as low confidence,
+which is the worst case.
+
+Build the lexicon first (python build_lexicon.py), then from the backend directory:
+    python -m benchmarks.bench_phonetics --words 1000000
+"""
+import argparse
+import itertools
+import random
+import time
+from core.config import settings
+from services.phonetics import PhoneticAnalyzer, normalize_word
+from services.pronunciation_service import PronunciationService
+
+TURN_WORDS = 12
+
+
+def legacy_identify(word_confidences, threshold=0.7):
+    """The previous PronunciationService.identify_problematic_phonemes"""
+    problematic = set()
+    for word, confidence in word_confidences:
+        if confidence < threshold:
+            word_lower = word.lower()
+            for phoneme, patterns in PronunciationService.PHONEME_PATTERNS.items():
+                if any(pattern in word_lower for pattern in patterns):
+                    problematic.add(phoneme)
+    return list(problematic)
+
+
+def corpus(vocabulary, count: int, seed: int = 42):
+    rng = random.Random(seed)
+    weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    return rng.choices(vocabulary, cum_weights=weights, k=count)
+
+
+def run(label: str, identify, turns, word_count: int):
+    start = time.perf_counter()
+    for turn in turns:
+        identify(turn)
+    elapsed = time.perf_counter() - start
+    print(f"{label:40s} {word_count / elapsed:14,.0f} words/s   {elapsed / len(turns) * 1e6:8.1f} µs/turn")
+
+
+def main(word_count: int):
+    start = time.perf_counter()
+    analyzer = PhoneticAnalyzer(settings.PRONUNCIATION_LEXICON_PATH)
+    print(f"{'open lexicon (mmap)':40s} {(time.perf_counter() - start) * 1000:14.2f} ms   "
+          f"{len(analyzer.lexicon) if analyzer.lexicon else 0} words")
+
+    if analyzer.lexicon is None:
+        raise SystemExit("Build the lexicon first: python build_lexicon.py")
+
+    vocabulary = list(analyzer.lexicon.words())
+    random.Random(1).shuffle(vocabulary)
+    words = corpus(vocabulary, word_count)
+    turns = [[(word, 0.5) for word in words[i:i + TURN_WORDS]] for i in range(0, len(words), TURN_WORDS)]
+
+    def identify(turn):
+        problematic = {}
+        for word, confidence in turn:
+            if confidence < 0.7:
+                for phoneme in analyzer.word_sounds(word):
+                    problematic[phoneme] = True
+        return list(problematic)
+
+    def identify_uncached(turn):
+        problematic = {}
+        for word, confidence in turn:
+            if confidence < 0.7:
+                for phoneme in analyzer._lookup_sounds(normalize_word(word)):
+                    problematic[phoneme] = True
+        return list(problematic)
+
+    run("substring scan (previous)", legacy_identify, turns, word_count)
+    run("lexicon lookups, no cache", identify_uncached, turns, word_count)
+    run("lexicon lookups, word cache", identify, turns, word_count)
+
+    start = time.perf_counter()
+    sample = words[:100000]
+    for word in sample:
+        analyzer.lexicon.lookup(word)
+    print(f"{'single lexicon lookup':40s} {(time.perf_counter() - start) / len(sample) * 1e6:14.2f} µs")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--words", type=int, default=1000000)
+    args = parser.parse_args()
+    main(args.words)
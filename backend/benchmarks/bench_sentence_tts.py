@@ -0,0 +1,66 @@
+"""
+Benchmark: time-to-first-audio and total time for a tutor reply, synthesized
+as one ElevenLabs call vs. sentence by sentence with bounded parallelism.
+
+The ElevenLabs client is replaced with a fake whose latency grows with the
+text length (fixed request overhead + per-character render time), which is
+roughly how the real API behaves. Caching is disabled so every call renders.
+
+Run from the backend directory:
+    python -m benchmarks.bench_sentence_tts
+"""
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("ELEVENLABS_API_KEY", "bench")
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ["TTS_CACHE_MEMORY_MB"] = "0"
+os.environ["TTS_CACHE_DISK_MB"] = "0"
+
+from services.elevenlabs_service import elevenlabs_service
+
+REQUEST_OVERHEAD = 0.25
+SECONDS_PER_CHAR = 0.008
+
+REPLY = (
+    "Great pronunciation! Good progress! Experiment with different tenses and connectors. "
+    "You could say 'Yesterday I went to the park with my sister' instead. "
+    "What did you enjoy most about your afternoon there?"
+)
+
+
+def _fake_convert(text, voice_id, model_id, **kwargs):
+    time.sleep(REQUEST_OVERHEAD + SECONDS_PER_CHAR * len(text))
+    yield b"\xff\xfb" * len(text)
+
+
+async def single_call():
+    start = time.perf_counter()
+    await elevenlabs_service.generate_audio(REPLY)
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed
+
+
+async def sentence_by_sentence():
+    start = time.perf_counter()
+    first = None
+    async for _ in elevenlabs_service.generate_audio_sentences(REPLY):
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+async def main():
+    elevenlabs_service.client = SimpleNamespace(text_to_speech=SimpleNamespace(convert=_fake_convert))
+    sentences = elevenlabs_service.split_sentences(REPLY)
+    print(f"Reply: {len(REPLY)} chars, {len(sentences)} sentences")
+
+    for name, run in (("single call", single_call), ("sentence-by-sentence", sentence_by_sentence)):
+        first, total = await run()
+        print(f"{name:22s} first audio {first * 1000:7.1f} ms   full reply {total * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
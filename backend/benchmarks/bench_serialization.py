@@ -0,0 +1,84 @@
+"""
+Benchmark: rendering the /gamification/stats and /gamification/leaderboard payloads.
+
+"before" is what FastAPI did for a returned dict: jsonable_encoder over the
+whole payload, then JSONResponse (json.dumps). "after" is the app's
+ORJSONResponse returned directly by the endpoint, so the payload is
+serialized once by orjson (datetime, ObjectId and models handled natively).
+
+Run from the backend directory:
+    python -m benchmarks.bench_serialization --repeat 2000
+"""
+import argparse
+import time
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from benchmarks.bench_model_views import achievement_documents, progress_document
+from core.serialization import ORJSONResponse
+from database.models import ProgressTrackingModel
+
+COUNTRIES = ["US", "PK", "IN", "GB", "BR"]
+
+
+def stats_payload(validated_models: bool):
+    progress = progress_document()
+    progress["_id"] = str(progress["_id"])
+    if validated_models:
+        # Before: nested PronunciationProgress models and pre-formatted dates
+        pronunciation_progress = ProgressTrackingModel(**progress).pronunciation_progress
+    else:
+        pronunciation_progress = progress["pronunciation_progress"]
+    return {
+        "user": {
+            "display_name": "Learner", "level": "intermediate", "total_points": 1840,
+            "current_streak": 12, "longest_streak": 31, "rank": 5120, "percentile": 12.4
+        },
+        "progress": {
+            "total_conversations": progress["total_conversations"],
+            "overall_pronunciation_score": progress["overall_pronunciation_score"],
+            "total_practice_time_minutes": progress["total_practice_time_minutes"],
+            "pronunciation_progress": pronunciation_progress
+        },
+        "achievements": [
+            {
+                "title": a["title"], "description": a["description"], "icon": a["icon"],
+                "earned_at": a["earned_at"].isoformat() if validated_models else a["earned_at"]
+            } for a in achievement_documents()
+        ]
+    }
+
+
+def leaderboard_payload(size: int):
+    return {
+        "leaderboard": [
+            {"rank": i + 1, "display_name": f"Learner {i}", "total_points": 100000 - i * 7, "current_streak": i % 40}
+            for i in range(size)
+        ]
+    }
+
+
+def timed(label: str, render, repeat: int):
+    size = len(render())
+    start = time.perf_counter()
+    for _ in range(repeat):
+        render()
+    per_call = (time.perf_counter() - start) / repeat
+    print(f"{label:52s} {per_call * 1e6:10.1f} µs   {size:7d} bytes")
+
+
+def main(repeat: int):
+    cases = [
+        ("stats", stats_payload(validated_models=True), stats_payload(validated_models=False)),
+        ("leaderboard top 100", leaderboard_payload(100), leaderboard_payload(100)),
+        ("leaderboard top 1000", leaderboard_payload(1000), leaderboard_payload(1000)),
+    ]
+    for name, before, after in cases:
+        timed(f"{name}: jsonable_encoder + JSONResponse", lambda: JSONResponse(jsonable_encoder(before)).body, repeat)
+        timed(f"{name}: ORJSONResponse", lambda: ORJSONResponse(after).body, repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.repeat)
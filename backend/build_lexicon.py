@@ -0,0 +1,44 @@
+from services.phonetics import read_cmudict, build_lexicon
+from core.config import settings
+from urllib.request import urlopen
+import gzip
+import hashlib
+import io
+import os
+import sys
+
+# CMUdict shipped with the repo (cmudict.LICENSE), so deploys build the lexicon without network access.
+# Taken from the cmudict 1.1.3 package (PyPI); bump the checksum together with the file.
+VENDORED_CMUDICT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "cmudict.dict.gz")
+VENDORED_CMUDICT_SHA256 = "1ee4489c70758b8c4f65c2b63aa294c7b20da7ffc7b91027d52913ba343dfc95"
+
+
+def read_source(source: str) -> bytes:
+    if source.startswith(("http://", "https://")):
+        with urlopen(source) as response:
+            return response.read()
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def source_lines(data: bytes, source: str):
+    if source.endswith(".gz"):
+        data = gzip.decompress(data)
+    return io.StringIO(data.decode("utf-8", errors="replace"))
+
+
+if __name__ == "__main__":
+    # Usage: python build_lexicon.py [cmudict file or URL] [output path]
+    source = sys.argv[1] if len(sys.argv) > 1 else VENDORED_CMUDICT
+    output = sys.argv[2] if len(sys.argv) > 2 else settings.PRONUNCIATION_LEXICON_PATH
+
+    data = read_source(source)
+    digest = hashlib.sha256(data).hexdigest()
+    if source == VENDORED_CMUDICT and digest != VENDORED_CMUDICT_SHA256:
+        sys.exit(f"❌ {source} has sha256 {digest}, expected {VENDORED_CMUDICT_SHA256}")
+
+    masks = read_cmudict(source_lines(data, source))
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    count = build_lexicon(masks, output)
+    print(f"✅ Wrote {count} words from {source} (sha256 {digest[:12]}) to {output} "
+          f"({os.path.getsize(output) / 2**20:.1f} MiB)")
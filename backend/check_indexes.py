@@ -0,0 +1,28 @@
+from database.indexes import ensure_indexes, verify_query_plans
+from database.mongo import db
+import asyncio
+import sys
+
+
+async def check_indexes() -> bool:
+    """Apply the declared indexes and check no hot query does a collection scan"""
+    database = db.get_db()
+
+    problems = await ensure_indexes(database)
+    for problem in problems:
+        print(f"⚠️ Index mismatch: {problem}")
+
+    collection_scans = await verify_query_plans(database)
+    for query in collection_scans:
+        print(f"❌ Collection scan: {query}")
+
+    if not problems and not collection_scans:
+        print("✅ All indexes present and every hot query uses one")
+    return not problems and not collection_scans
+
+
+if __name__ == "__main__":
+    db.connect()
+    ok = asyncio.run(check_indexes())
+    db.close()
+    sys.exit(0 if ok else 1)
@@ -1,5 +1,5 @@
 import os
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -12,8 +12,71 @@ class Settings(BaseSettings):
     PORT: int = 8000
     ENVIRONMENT: str = "development"
     FIREBASE_ADMIN_SDK_PATH: str = "./firebase-admin-sdk.json"
-    
-    class Config:
-        case_sensitive = True
+    # Refuse to start if a hot query would run as a collection scan
+    MONGO_VERIFY_QUERY_PLANS: bool = False
+    # Background pipeline for turn bookkeeping (history, progress, streaks, points)
+    TURN_EVENT_QUEUE_SIZE: int = 10000
+    TURN_EVENT_BATCH_SIZE: int = 100
+    TURN_EVENT_LINGER_MS: int = 50
+    TURN_EVENT_DRAIN_TIMEOUT_SECONDS: int = 10
+    # A failed batch is retried (its unfinished writes only) with doubling backoff, then logged as lost
+    TURN_EVENT_MAX_ATTEMPTS: int = 4
+    TURN_EVENT_RETRY_BACKOFF_MS: int = 500
+    # Memory-mapped pronunciation lexicon (python build_lexicon.py) and per-worker word cache
+    PRONUNCIATION_LEXICON_PATH: str = "./data/lexicon.bin"
+    PHONETICS_CACHE_SIZE: int = 100000
+    # Audio uploads are read in chunks and capped (Google's synchronous recognize takes up to 10 MB inline)
+    AUDIO_UPLOAD_MAX_BYTES: int = 10 * 1024 * 1024
+    AUDIO_UPLOAD_CHUNK_BYTES: int = 64 * 1024
+    # Local audio pre-processing before STT: decode pool size, voice-activity detection, trimming
+    AUDIO_PREPROCESS_WORKERS: int = 2
+    AUDIO_VAD_MIN_DBFS: float = -50.0
+    AUDIO_VAD_PADDING_MS: int = 200
+    AUDIO_TRIM_MIN_SECONDS: float = 0.5
+    # Per-phoneme progress: recent scores kept, and EMA smoothing factor
+    PRONUNCIATION_SCORE_WINDOW: int = 20
+    PRONUNCIATION_EMA_ALPHA: float = 0.2
+    # Full reload interval of the in-process leaderboard when it can't follow a users change stream
+    LEADERBOARD_REBUILD_SECONDS: int = 300
+    # Maintain per-user, per-day error counts when conversations are saved
+    ERROR_ROLLUPS_ENABLED: bool = True
+
+    # Thread pool sizes for the blocking upstream SDK calls
+    STT_MAX_WORKERS: int = 8
+    STT_STREAM_MAX_WORKERS: int = 16
+    GEMINI_MAX_WORKERS: int = 8
+    TTS_MAX_WORKERS: int = 8
+    AUTH_MAX_WORKERS: int = 4
+
+    # Verified Firebase ID tokens kept in memory until they expire
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    # Minimum interval between cert downloads forced by tokens with an unknown key id
+    AUTH_CERT_MIN_REFRESH_SECONDS: int = 60
+
+    # Synthesized speech cache (memory LRU in front of a disk store)
+    TTS_CACHE_MEMORY_MB: int = 64
+    TTS_CACHE_DISK_MB: int = 512
+    TTS_CACHE_DIR: str = "./.cache/tts"
+    # Replies are synthesized sentence by sentence, this many at a time
+    TTS_SENTENCE_CONCURRENCY: int = 3
+    # How long a streamed-audio URL stays valid after the turn response
+    TTS_STREAM_TTL_SECONDS: int = 300
+
+    # Users known to be provisioned in this process (skips the per-request upsert)
+    KNOWN_USERS_CACHE_SIZE: int = 50000
+
+    # Voice catalog refresh interval, and retry interval after a failed fetch
+    VOICE_CATALOG_TTL_SECONDS: int = 3600
+    VOICE_CATALOG_RETRY_SECONDS: int = 30
+
+    # Recognized transcripts keyed by audio digest and recognition config (client retries skip STT)
+    STT_CACHE_SIZE: int = 1024
+    STT_CACHE_TTL_SECONDS: int = 600
+
+    # Gemini analysis result cache
+    GEMINI_CACHE_SIZE: int = 2048
+    GEMINI_CACHE_TTL_SECONDS: int = 3600
+
+    model_config = SettingsConfigDict(case_sensitive=True)
 
 settings = Settings()
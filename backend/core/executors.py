@@ -0,0 +1,94 @@
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable
+from core.config import settings
+
+_PROCESS_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class ProviderExecutors:
+    """
+    Bounded thread pools for the blocking upstream SDKs (Google STT, Gemini, ElevenLabs, Firebase auth).
+    Each provider gets its own pool so a slow provider cannot starve the others,
+    and none of them can block the event loop.
+    CPU-bound local work (audio decoding) gets process pools, out of reach of the GIL.
+    """
+
+    def __init__(self):
+        self._sizes = {
+            "stt": settings.STT_MAX_WORKERS,
+            # A streaming recognition holds its thread for the whole utterance
+            "stt_stream": settings.STT_STREAM_MAX_WORKERS,
+            "gemini": settings.GEMINI_MAX_WORKERS,
+            "tts": settings.TTS_MAX_WORKERS,
+            "auth": settings.AUTH_MAX_WORKERS,
+        }
+        self._process_sizes = {
+            "audio": settings.AUDIO_PREPROCESS_WORKERS,
+        }
+        self._pools: Dict[str, Executor] = {}
+
+    def get(self, provider: str) -> Executor:
+        pool = self._pools.get(provider)
+        if isinstance(pool, ProcessPoolExecutor) and pool._broken:
+            # A worker died (e.g. killed for memory); a broken pool fails every later call
+            pool.shutdown(wait=False)
+            pool = None
+        if pool is None:
+            if provider in self._process_sizes:
+                # Not fork: the parent already runs gRPC and Motor threads, whose locks a forked child could inherit held
+                pool = ProcessPoolExecutor(
+                    max_workers=self._process_sizes[provider],
+                    mp_context=multiprocessing.get_context(_PROCESS_START_METHOD)
+                )
+            elif provider in self._sizes:
+                pool = ThreadPoolExecutor(
+                    max_workers=self._sizes[provider],
+                    thread_name_prefix=f"{provider}-worker"
+                )
+            else:
+                raise ValueError(f"Unknown provider: {provider}")
+            self._pools[provider] = pool
+        return pool
+
+    async def run(self, provider: str, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking call on the provider's pool and await its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.get(provider),
+            functools.partial(func, *args, **kwargs)
+        )
+
+    async def iterate(self, provider: str, make_iterable: Callable[[], Iterable]) -> AsyncIterator:
+        """
+        Consume a blocking iterator (e.g. a streaming HTTP response) on the
+        provider's pool, yielding each item to the event loop as it arrives.
+        """
+        loop = asyncio.get_running_loop()
+        pool = self.get(provider)
+        iterator = await loop.run_in_executor(pool, lambda: iter(make_iterable()))
+        finished = object()
+        try:
+            while True:
+                item = await loop.run_in_executor(pool, next, iterator, finished)
+                if item is finished:
+                    return
+                yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                await loop.run_in_executor(pool, close)
+
+    def shutdown(self):
+        for pool in self._pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        self._pools.clear()
+
+
+provider_executors = ProviderExecutors()
+
+
+async def run_blocking(provider: str, func: Callable, *args, **kwargs) -> Any:
+    return await provider_executors.run(provider, func, *args, **kwargs)
@@ -0,0 +1,38 @@
+from typing import Any, Dict
+import orjson
+from bson import ObjectId
+from fastapi.responses import ORJSONResponse as _ORJSONResponse
+from pydantic import BaseModel
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj: Any) -> Any:
+    # Only called for types orjson doesn't know; datetime, dict, list, numpy etc. are native
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Serializes API payloads and Mongo documents (ObjectId, datetime, models included)"""
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+def to_document(model: BaseModel) -> Dict:
+    """Mongo document for a model: aliased field names, no id (MongoDB assigns _id)"""
+    return model.model_dump(by_alias=True, exclude={"id"})
+
+
+class ORJSONResponse(_ORJSONResponse):
+    """
+    Default response class of the app. Endpoints on hot paths return it directly,
+    which also skips FastAPI's jsonable_encoder pass over returned dicts.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
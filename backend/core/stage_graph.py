@@ -0,0 +1,121 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List
+
+
+StageFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class Stage:
+    def __init__(self, name: str, func: StageFunc, deps: Iterable[str] = ()):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+
+
+class StageRun:
+    """
+    Results and timings of one run of a StageGraph
+    """
+
+    def __init__(self, graph: "StageGraph", results: Dict[str, Any], timings: Dict[str, Dict[str, float]]):
+        self.graph = graph
+        self.results = results
+        self.timings = timings
+
+    def __getitem__(self, name: str) -> Any:
+        return self.results[name]
+
+    @property
+    def total_ms(self) -> float:
+        return max((t["end_ms"] for t in self.timings.values()), default=0.0)
+
+    def critical_path(self) -> List[str]:
+        """
+        Walk back from the stage that finished last, always following the
+        dependency that finished last - that chain is what bounded the run.
+        """
+        if not self.timings:
+            return []
+        current = max(self.timings, key=lambda name: self.timings[name]["end_ms"])
+        path = [current]
+        while True:
+            deps = [d for d in self.graph.stages[current].deps if d in self.timings]
+            if not deps:
+                break
+            current = max(deps, key=lambda name: self.timings[name]["end_ms"])
+            path.append(current)
+        return list(reversed(path))
+
+    def report(self) -> Dict:
+        return {
+            "stages": {name: {k: round(v, 1) for k, v in t.items()} for name, t in self.timings.items()},
+            "total_ms": round(self.total_ms, 1),
+            "critical_path": self.critical_path()
+        }
+
+    def server_timing(self) -> str:
+        """Value for a Server-Timing response header"""
+        return ", ".join(f"{name};dur={t['duration_ms']:.1f}" for name, t in self.timings.items())
+
+
+class StageGraph:
+    """
+    A small dependency graph of async stages. Every stage starts as soon as
+    the stages it depends on have finished, so independent work overlaps.
+    Each stage receives a dict with the inputs and the results of all stages
+    finished so far.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Stage] = {}
+
+    def stage(self, name: str, *deps: str):
+        """Decorator registering an async function as a stage"""
+        def register(func: StageFunc) -> StageFunc:
+            self.add(name, func, deps)
+            return func
+        return register
+
+    def add(self, name: str, func: StageFunc, deps: Iterable[str] = ()):
+        if name in self.stages:
+            raise ValueError(f"Stage already registered: {name}")
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"Stage {name} depends on unknown stage {dep}")
+        self.stages[name] = Stage(name, func, deps)
+
+    async def run(self, **inputs: Any) -> StageRun:
+        """
+        Run every stage. A keyword argument named like a stage supplies that
+        stage's result up front, and the stage itself is skipped.
+        """
+        results: Dict[str, Any] = dict(inputs)
+        timings: Dict[str, Dict[str, float]] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+        started = time.perf_counter()
+
+        async def run_stage(stage: Stage):
+            await asyncio.gather(*(tasks[dep] for dep in stage.deps if dep in tasks))
+            stage_start = time.perf_counter()
+            results[stage.name] = await stage.func(results)
+            stage_end = time.perf_counter()
+            timings[stage.name] = {
+                "start_ms": (stage_start - started) * 1000,
+                "end_ms": (stage_end - started) * 1000,
+                "duration_ms": (stage_end - stage_start) * 1000
+            }
+
+        # Stages are registered after their dependencies, so insertion order is topological
+        for stage in self.stages.values():
+            if stage.name not in inputs:
+                tasks[stage.name] = asyncio.create_task(run_stage(stage))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        return StageRun(self, results, timings)
@@ -0,0 +1,118 @@
+from typing import Any, Dict, List, Tuple
+from datetime import datetime
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+
+# Every index a repository query relies on, by collection
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("firebase_uid", ASCENDING)], name="firebase_uid_unique", unique=True),
+        IndexModel([("total_points", DESCENDING)], name="total_points_desc"),
+    ],
+    "conversations": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_id_created_at"),
+    ],
+    "achievements": [
+        IndexModel([("user_id", ASCENDING), ("achievement_type", ASCENDING)], name="user_id_achievement_type_unique", unique=True),
+    ],
+    "progress": [
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+    ],
+    "error_rollups": [
+        IndexModel([("user_id", ASCENDING), ("day", ASCENDING)], name="user_id_day_unique", unique=True),
+    ],
+}
+
+# (collection, filter, sort) shapes of the hot repository queries
+_PROBE_USER = "__index_probe__"
+HOT_QUERIES: List[Tuple[str, Dict, List[Tuple[str, int]]]] = [
+    ("users", {"firebase_uid": _PROBE_USER}, []),
+    ("users", {}, [("total_points", DESCENDING)]),
+    ("users", {"total_points": {"$gt": 0}}, []),
+    ("conversations", {"user_id": _PROBE_USER}, [("created_at", DESCENDING)]),
+    ("conversations", {"user_id": _PROBE_USER, "created_at": {"$gte": datetime(2000, 1, 1)}}, []),
+    ("achievements", {"user_id": _PROBE_USER, "achievement_type": "first_conversation"}, []),
+    ("achievements", {"user_id": _PROBE_USER}, []),
+    ("progress", {"user_id": _PROBE_USER}, []),
+    ("error_rollups", {"user_id": _PROBE_USER, "day": {"$gte": datetime(2000, 1, 1)}}, []),
+]
+
+# Index options that change behaviour and therefore must match
+_COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+
+def _key_pattern(key) -> Tuple:
+    return tuple((field, int(direction)) for field, direction in key)
+
+
+def _options(spec: Dict[str, Any]) -> Dict[str, Any]:
+    return {option: spec[option] for option in _COMPARED_OPTIONS if spec.get(option) not in (None, False)}
+
+
+async def ensure_indexes(database) -> List[str]:
+    """
+    Creates missing indexes (idempotent) and returns a list of problems:
+    indexes that exist with the same keys but different options, or that
+    could not be built (e.g. duplicate values under a unique index).
+    Existing indexes are never dropped.
+    """
+    problems = []
+
+    for collection_name, models in INDEXES.items():
+        collection = database[collection_name]
+        existing = await collection.index_information()
+        existing_by_key = {_key_pattern(info["key"]): (name, info) for name, info in existing.items()}
+
+        missing = []
+        for model in models:
+            wanted = model.document
+            key = _key_pattern(wanted["key"].items())
+            if key not in existing_by_key:
+                missing.append(model)
+                continue
+            name, info = existing_by_key[key]
+            if _options(info) != _options(wanted):
+                problems.append(
+                    f"{collection_name}.{name}: options {_options(info)} differ from declared {_options(wanted)}"
+                )
+
+        for model in missing:
+            try:
+                await collection.create_indexes([model])
+                print(f"Created index {collection_name}.{model.document['name']}")
+            except OperationFailure as e:
+                problems.append(f"{collection_name}.{model.document['name']}: could not be created ({e})")
+
+    return problems
+
+
+def _stages(plan: Any) -> List[str]:
+    """All stage names in an explain plan, across classic and SBE explain formats"""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_stages(item))
+    return stages
+
+
+async def verify_query_plans(database) -> List[str]:
+    """
+    Explains every hot query and returns those whose winning plan
+    falls back to a collection scan.
+    """
+    collection_scans = []
+    for collection_name, query, sort in HOT_QUERIES:
+        cursor = database[collection_name].find(query).limit(100)
+        if sort:
+            cursor = cursor.sort(sort)
+        explanation = await cursor.explain()
+        winning_plan = explanation.get("queryPlanner", {}).get("winningPlan", {})
+        if "COLLSCAN" in _stages(winning_plan):
+            collection_scans.append(f"{collection_name}.find({query}) sort={sort}")
+    return collection_scans
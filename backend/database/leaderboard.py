@@ -0,0 +1,289 @@
+import asyncio
+from bisect import bisect_left, insort
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional, Tuple
+from pymongo.errors import PyMongoError
+
+# (-total_points, firebase_uid): ascending order is the leaderboard order
+RankKey = Tuple[int, str]
+
+# users fields the index needs
+LEADERBOARD_PROJECTION = {
+    "_id": 0, "firebase_uid": 1, "display_name": 1, "total_points": 1,
+    "current_streak": 1, "settings.country": 1, "settings.age_group": 1
+}
+
+# users changes the index follows: the post-change document, cut down to the indexed fields
+_CHANGE_PIPELINE = [
+    {"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}},
+    {"$project": {f"fullDocument.{field}": 1 for field in LEADERBOARD_PROJECTION if field != "_id"}}
+]
+
+
+class SortedKeyList:
+    """
+    Sorted list split into bounded chunks, so an insert or removal shifts at
+    most one chunk (O(sqrt n)-ish) instead of the whole list. Positions come
+    from the chunk start offsets, recomputed (O(n / load)) only after a change.
+    """
+
+    def __init__(self, keys: List[RankKey] = None, load: int = 1000):
+        self._load = load
+        keys = sorted(keys or [])
+        self._chunks: List[List[RankKey]] = [keys[i:i + load] for i in range(0, len(keys), load)]
+        self._maxes: List[RankKey] = [chunk[-1] for chunk in self._chunks]
+        self._len = len(keys)
+        self._offsets: Optional[List[int]] = None
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, key: RankKey):
+        self._offsets = None
+        if not self._chunks:
+            self._chunks.append([key])
+            self._maxes.append(key)
+        else:
+            pos = bisect_left(self._maxes, key)
+            if pos == len(self._chunks):
+                pos -= 1
+            chunk = self._chunks[pos]
+            insort(chunk, key)
+            self._maxes[pos] = chunk[-1]
+            if len(chunk) > 2 * self._load:
+                self._chunks[pos:pos + 1] = [chunk[:self._load], chunk[self._load:]]
+                self._maxes[pos:pos + 1] = [chunk[self._load - 1], chunk[-1]]
+        self._len += 1
+
+    def discard(self, key: RankKey):
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._chunks):
+            return
+        chunk = self._chunks[pos]
+        i = bisect_left(chunk, key)
+        if i == len(chunk) or chunk[i] != key:
+            return
+        del chunk[i]
+        self._len -= 1
+        self._offsets = None
+        if chunk:
+            self._maxes[pos] = chunk[-1]
+        else:
+            del self._chunks[pos]
+            del self._maxes[pos]
+
+    def bisect_left(self, key: RankKey) -> int:
+        """Number of keys ordered before key"""
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._chunks):
+            return self._len
+        if self._offsets is None:
+            self._offsets = [0, *accumulate(len(chunk) for chunk in self._chunks)]
+        return self._offsets[pos] + bisect_left(self._chunks[pos], key)
+
+    def head(self, n: int) -> Iterator[RankKey]:
+        """The first n keys, touching only the chunks they live in"""
+        for chunk in self._chunks:
+            if n <= 0:
+                return
+            yield from chunk[:n]
+            n -= len(chunk)
+
+
+class LeaderboardIndex:
+    """
+    In-process materialized leaderboard: users ordered by points, globally and
+    per settings.country, kept current by the user repository's writes.
+    Top-N reads walk N keys in memory; a rank is a bisect for the first key
+    with the user's points, so it needs no structure beyond the partition.
+
+    Each worker process holds its own copy. After one full load it follows a
+    change stream on users to pick up writes made by other workers; only when
+    change streams aren't available (standalone MongoDB) or the stream breaks
+    does it fall back to full reloads. Writes that arrive during a load
+    (including points/streak updates) are replayed on top of it.
+    """
+
+    GLOBAL = None
+
+    def __init__(self):
+        # firebase_uid -> (total_points, current_streak, display_name, country, age_group)
+        self._users: Dict[str, Tuple[int, int, Optional[str], Optional[str], Optional[str]]] = {}
+        self._partitions: Dict[Optional[str], SortedKeyList] = {self.GLOBAL: SortedKeyList()}
+        self.loaded = False
+        self._rebuild_log: Optional[List[Tuple]] = None
+        self._following = False
+        self._refresher: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def record(self, user: Dict):
+        """Insert or replace a user from a users document"""
+        user_settings = user.get("settings") or {}
+        state = (
+            user.get("total_points", 0),
+            user.get("current_streak", 0),
+            user.get("display_name"),
+            user_settings.get("country"),
+            user_settings.get("age_group")
+        )
+        self._log(self._put, user["firebase_uid"], state)
+        self._put(user["firebase_uid"], state)
+
+    def update_points(self, user_id: str, total_points: int):
+        # Logged even for users not loaded yet: the load in progress may bring them
+        self._log(self.update_points, user_id, total_points)
+        current = self._users.get(user_id)
+        if current is not None:
+            self._put(user_id, (total_points,) + current[1:])
+
+    def update_streak(self, user_id: str, current_streak: int):
+        self._log(self.update_streak, user_id, current_streak)
+        current = self._users.get(user_id)
+        if current is not None:
+            self._put(user_id, current[:1] + (current_streak,) + current[2:])
+
+    def _log(self, apply, *args):
+        if self._rebuild_log is not None:
+            self._rebuild_log.append((apply, args))
+
+    def _put(self, user_id: str, state: Tuple):
+        previous = self._users.get(user_id)
+        if previous is not None:
+            old_key = (-previous[0], user_id)
+            self._partitions[self.GLOBAL].discard(old_key)
+            if previous[3] is not None:
+                self._partitions[previous[3]].discard(old_key)
+
+        self._users[user_id] = state
+        key = (-state[0], user_id)
+        self._partitions[self.GLOBAL].add(key)
+        if state[3] is not None:
+            self._partitions.setdefault(state[3], SortedKeyList()).add(key)
+
+    def standing(self, user_id: str, country: Optional[str] = None) -> Optional[Dict]:
+        """
+        The user's rank among users with more points (ties share a rank),
+        the partition size and the "top X%" percentile. None for unknown users.
+        """
+        state = self._users.get(user_id)
+        partition = self._partitions.get(country)
+        if state is None or partition is None or not len(partition):
+            return None
+        # "" sorts before every uid, so this counts exactly the users with more points
+        rank = partition.bisect_left((-state[0], "")) + 1
+        return {
+            "rank": rank,
+            "total_users": len(partition),
+            "percentile": round(100.0 * rank / len(partition), 1)
+        }
+
+    def top(self, limit: int = 100, country: Optional[str] = None) -> List[Dict]:
+        """Top `limit` users, globally or within one country, with 1-based ranks"""
+        partition = self._partitions.get(country)
+        if partition is None:
+            return []
+
+        entries = []
+        for rank, (_, user_id) in enumerate(partition.head(limit), start=1):
+            total_points, current_streak, display_name, user_country, age_group = self._users[user_id]
+            entries.append({
+                "user_id": user_id,
+                "display_name": display_name or "Anonymous",
+                "total_points": total_points,
+                "current_streak": current_streak,
+                "rank": rank,
+                "country": user_country,
+                "age_group": age_group
+            })
+        return entries
+
+    async def rebuild(self, database):
+        """Reload every user from MongoDB and swap the new index in"""
+        self._rebuild_log = []
+        try:
+            users = {}
+            async for user in database.users.find({}, LEADERBOARD_PROJECTION):
+                user_settings = user.get("settings") or {}
+                users[user["firebase_uid"]] = (
+                    user.get("total_points", 0),
+                    user.get("current_streak", 0),
+                    user.get("display_name"),
+                    user_settings.get("country"),
+                    user_settings.get("age_group")
+                )
+            # Sorting a million keys takes a while, keep it off the event loop
+            partitions = await asyncio.to_thread(self._build_partitions, users)
+            replay, self._rebuild_log = self._rebuild_log, None
+        except BaseException:
+            self._rebuild_log = None
+            raise
+
+        self._users, self._partitions = users, partitions
+        for apply, args in replay:
+            apply(*args)
+        self.loaded = True
+
+    @classmethod
+    def _build_partitions(cls, users: Dict[str, Tuple]) -> Dict[Optional[str], SortedKeyList]:
+        keys_by_partition: Dict[Optional[str], List[RankKey]] = {cls.GLOBAL: []}
+        for user_id, state in users.items():
+            key = (-state[0], user_id)
+            keys_by_partition[cls.GLOBAL].append(key)
+            if state[3] is not None:
+                keys_by_partition.setdefault(state[3], []).append(key)
+        return {partition: SortedKeyList(keys) for partition, keys in keys_by_partition.items()}
+
+    async def follow(self, database):
+        """
+        Full load, then apply every users change from a change stream until it
+        breaks. The stream is opened first, so nothing written during the load is missed.
+        """
+        async with database.users.watch(_CHANGE_PIPELINE, full_document="updateLookup") as stream:
+            self._following = True
+            await self.rebuild(database)
+            async for change in stream:
+                user = change.get("fullDocument")
+                if user and user.get("firebase_uid"):
+                    self.record(user)
+
+    async def _rebuild_forever(self, database, interval: float):
+        warned = False
+        while True:
+            self._following = False
+            try:
+                await self.follow(database)
+            except PyMongoError as e:
+                if self._following:
+                    # The stream broke after it was open: reopen it (with a fresh load) right away
+                    print(f"Leaderboard change stream interrupted, reopening: {e}")
+                    await asyncio.sleep(1)
+                    continue
+                # No change streams (e.g. a standalone server): fall back to periodic full loads
+                if not warned:
+                    print(f"Leaderboard change stream unavailable ({e}), reloading every {interval:.0f}s")
+                    warned = True
+                try:
+                    await self.rebuild(database)
+                except Exception as e:
+                    print(f"Error rebuilding leaderboard index: {e}")
+            except Exception as e:
+                print(f"Error rebuilding leaderboard index: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self, database, interval: float):
+        if self._refresher is None:
+            self._refresher = asyncio.create_task(self._rebuild_forever(database, interval))
+
+    async def stop(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+
+
+leaderboard_index = LeaderboardIndex()
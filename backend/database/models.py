@@ -1,7 +1,6 @@
 from datetime import datetime
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
-from bson import ObjectId
+from typing import List, Optional, Dict, Any, Tuple
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class UserModel(BaseModel):
@@ -16,12 +15,12 @@ class UserModel(BaseModel):
     current_streak: int = 0
     longest_streak: int = 0
     last_practice_date: Optional[datetime] = None
+    streak_last_day: Optional[int] = None  # Days since the epoch (UTC) of the last practice
+    streak_days: int = 0  # Bit n set = practiced n days before streak_last_day
     created_at: datetime = Field(default_factory=datetime.utcnow)
     settings: Dict = Field(default_factory=dict)
 
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str, datetime: lambda v: v.isoformat()}
+    model_config = ConfigDict(populate_by_name=True)
 
 
 class ErrorDetail(BaseModel):
@@ -44,20 +43,23 @@ class ConversationHistoryModel(BaseModel):
     emotional_feedback: Optional[str] = None
     pronunciation_score: Optional[float] = None
     word_confidence_scores: Optional[Dict[str, float]] = None
+    word_timings: Optional[List[Tuple[str, float, float, float]]] = None  # Kept for re-scoring in bulk
     problematic_phonemes: Optional[List[str]] = None
     cultural_context: Optional[str] = None
     ai_personality_used: str = "friendly"
     session_duration_seconds: Optional[float] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str, datetime: lambda v: v.isoformat()}
+    model_config = ConfigDict(populate_by_name=True)
 
 
 class PronunciationProgress(BaseModel):
     phoneme: str
-    scores: List[float] = []
+    scores: List[float] = []  # Most recent scores only (PRONUNCIATION_SCORE_WINDOW)
+    count: int = 0
+    total: float = 0.0
+    total_sq: float = 0.0
+    ema: Optional[float] = None
     last_practice_date: datetime
     improvement_percentage: float = 0.0
 
@@ -74,9 +76,7 @@ class ProgressTrackingModel(BaseModel):
     average_session_duration: float = 0.0
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str, datetime: lambda v: v.isoformat()}
+    model_config = ConfigDict(populate_by_name=True)
 
 
 class AchievementModel(BaseModel):
@@ -89,9 +89,35 @@ class AchievementModel(BaseModel):
     earned_at: datetime = Field(default_factory=datetime.utcnow)
     metadata: Optional[Dict] = None
 
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str, datetime: lambda v: v.isoformat()}
+    model_config = ConfigDict(populate_by_name=True)
+
+
+# Read views: only the fields a hot read path uses, validated from a projection
+# (see the repositories' view argument)
+
+class UserStatsView(BaseModel):
+    display_name: Optional[str] = None
+    level: str = "beginner"
+    total_points: int = 0
+    current_streak: int = 0
+    longest_streak: int = 0
+
+
+class ProgressSummaryView(BaseModel):
+    total_conversations: int = 0
+    overall_pronunciation_score: float = 0.0
+    total_practice_time_minutes: float = 0.0
+
+
+class ProgressStatsView(ProgressSummaryView):
+    pronunciation_progress: Dict[str, PronunciationProgress] = {}
+
+
+class AchievementView(BaseModel):
+    title: str
+    description: str
+    icon: str
+    earned_at: datetime
 
 
 class StreakModel(BaseModel):
@@ -102,9 +128,7 @@ class StreakModel(BaseModel):
     last_practice_date: Optional[datetime] = None
     streak_history: List[datetime] = []
 
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str, datetime: lambda v: v.isoformat()}
+    model_config = ConfigDict(populate_by_name=True)
 
 
 class LeaderboardEntry(BaseModel):
@@ -1,5 +1,6 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from core.config import settings
+from database.indexes import ensure_indexes, verify_query_plans
 
 class Database:
     client: AsyncIOMotorClient = None
@@ -13,6 +14,27 @@ class Database:
             self.client.close()
             print("Disconnected from MongoDB Atlas")
 
+    async def bootstrap_indexes(self):
+        """
+        Applies the declared indexes at startup and reports mismatches.
+        With MONGO_VERIFY_QUERY_PLANS, startup fails if a hot query would collection-scan.
+        """
+        try:
+            problems = await ensure_indexes(self.get_db())
+        except Exception as e:
+            print(f"Could not apply MongoDB indexes: {e}")
+            if settings.MONGO_VERIFY_QUERY_PLANS:
+                raise
+            return
+
+        for problem in problems:
+            print(f"WARNING: MongoDB index mismatch - {problem}")
+
+        if settings.MONGO_VERIFY_QUERY_PLANS:
+            collection_scans = await verify_query_plans(self.get_db())
+            if collection_scans:
+                raise RuntimeError(f"Hot queries fall back to collection scans: {collection_scans}")
+
     def get_db(self):
          # Assuming database name is 'language_learning_db', you can also make this configurable
         return self.client.language_learning_db
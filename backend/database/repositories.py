@@ -1,53 +1,206 @@
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Set, Type, TypeVar, Union
 from database.models import (
     UserModel, ConversationHistoryModel, ProgressTrackingModel,
-    AchievementModel, StreakModel, LeaderboardEntry
+    AchievementModel, LeaderboardEntry
 )
 from database.mongo import get_database
+from pydantic import BaseModel
+from database.leaderboard import leaderboard_index, LEADERBOARD_PROJECTION
+from core.config import settings
+from core.serialization import to_document
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+# users fields mirrored in the in-process leaderboard index
+_LEADERBOARD_FIELDS = {"display_name", "total_points", "current_streak", "settings"}
+
+
+def _projection(view: Type[BaseModel]) -> Dict:
+    """Projection reading exactly a view model's fields"""
+    return {"_id": 0, **{field.alias or name: 1 for name, field in view.model_fields.items()}}
+
+
+def _model(model: Type[ModelT], document: Dict) -> ModelT:
+    """Validates a whole document; the ObjectId _id becomes the model's str id"""
+    if "_id" in document:
+        document["_id"] = str(document["_id"])
+    return model.model_validate(document)
 
 
 class UserRepository:
     @staticmethod
     async def create_user(user: UserModel) -> str:
         db = await get_database()
-        result = await db.users.insert_one(user.dict(by_alias=True, exclude={"id"}))
+        user_doc = to_document(user)
+        result = await db.users.insert_one(user_doc)
+        leaderboard_index.record(user_doc)
         return str(result.inserted_id)
     
     @staticmethod
-    async def get_user_by_firebase_uid(firebase_uid: str) -> Optional[UserModel]:
+    async def ensure_user(user: UserModel) -> bool:
+        """
+        Creates the user if no user with this firebase_uid exists yet, in one upsert.
+        Returns True if the user was created.
+        """
+        db = await get_database()
+        user_doc = to_document(user)
+        result = await db.users.update_one(
+            {"firebase_uid": user.firebase_uid},
+            {"$setOnInsert": user_doc},
+            upsert=True
+        )
+        if result.upserted_id is not None:
+            leaderboard_index.record(user_doc)
+        return result.upserted_id is not None
+    
+    @staticmethod
+    async def get_user_by_firebase_uid(
+        firebase_uid: str,
+        view: Optional[Type[ModelT]] = None
+    ) -> Optional[Union[UserModel, ModelT]]:
+        """Returns the user, or only the fields of a view model (e.g. UserStatsView) if one is passed"""
         db = await get_database()
+        if view is not None:
+            user_data = await db.users.find_one({"firebase_uid": firebase_uid}, _projection(view))
+            return view.model_validate(user_data) if user_data is not None else None
         user_data = await db.users.find_one({"firebase_uid": firebase_uid})
-        if user_data:
-            return UserModel(**user_data)
+        if user_data is not None:
+            return _model(UserModel, user_data)
         return None
     
     @staticmethod
     async def update_user(firebase_uid: str, update_data: Dict) -> bool:
         db = await get_database()
-        result = await db.users.update_one(
+        if not any(field.split(".")[0] in _LEADERBOARD_FIELDS for field in update_data):
+            result = await db.users.update_one(
+                {"firebase_uid": firebase_uid},
+                {"$set": update_data}
+            )
+            return result.modified_count > 0
+
+        # Fields shown on (or partitioning) the leaderboard changed - refresh the user's entry
+        user = await db.users.find_one_and_update(
             {"firebase_uid": firebase_uid},
-            {"$set": update_data}
+            {"$set": update_data},
+            projection=LEADERBOARD_PROJECTION,
+            return_document=ReturnDocument.AFTER
         )
-        return result.modified_count > 0
+        if user:
+            leaderboard_index.record(user)
+        return user is not None
     
     @staticmethod
     async def increment_points(firebase_uid: str, points: int) -> bool:
         db = await get_database()
-        result = await db.users.update_one(
+        user = await db.users.find_one_and_update(
             {"firebase_uid": firebase_uid},
-            {"$inc": {"total_points": points}}
+            {"$inc": {"total_points": points}},
+            projection={"_id": 0, "total_points": 1},
+            return_document=ReturnDocument.AFTER
         )
-        return result.modified_count > 0
+        if user:
+            leaderboard_index.update_points(firebase_uid, user["total_points"])
+        return user is not None
+
+
+def _error_rollup_field(error_type: Optional[str]) -> str:
+    # Field names can't contain '.' or start with '$'
+    return f"counts.{(error_type or 'other').replace('.', '_').lstrip('$')}"
+
+
+# Batch writes (record_error_rollups, record_turns) remember the ids of their
+# last few batches in the document, so a retried batch doesn't count twice
+APPLIED_BATCHES_KEPT = 32
+
+
+async def _guarded_bulk_write(collection, operations: List[UpdateOne]) -> None:
+    """
+    Unordered bulk_write of upserts filtered on {"applied_batches": {"$ne": batch_id}}.
+    When the batch was already applied the filter misses, the upsert collides
+    with the unique index and the duplicate key error means "nothing to do".
+    """
+    try:
+        await collection.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        if any(error["code"] != 11000 for error in e.details.get("writeErrors", [])):
+            raise
 
 
 class ConversationRepository:
     @staticmethod
     async def save_conversation(conversation: ConversationHistoryModel) -> str:
         db = await get_database()
-        result = await db.conversations.insert_one(conversation.dict(by_alias=True, exclude={"id"}))
+        result = await db.conversations.insert_one(to_document(conversation))
+        if settings.ERROR_ROLLUPS_ENABLED and conversation.errors:
+            await ConversationRepository.record_error_rollup(
+                conversation.user_id,
+                [error.error_type for error in conversation.errors],
+                conversation.created_at
+            )
         return str(result.inserted_id)
     
+    @staticmethod
+    async def save_conversations(conversations: List[ConversationHistoryModel]) -> int:
+        """
+        Batch version of save_conversation in one insert_many, without the error
+        rollups (see record_error_rollups).
+        Conversations with an id are inserted under it, so saving them again (a retried
+        batch) skips the ones already stored instead of duplicating them.
+        Returns how many were inserted.
+        """
+        if not conversations:
+            return 0
+        db = await get_database()
+        documents = []
+        for conversation in conversations:
+            document = to_document(conversation)
+            if conversation.id is not None:
+                document["_id"] = ObjectId(conversation.id)
+            documents.append(document)
+        try:
+            await db.conversations.insert_many(documents, ordered=False)
+            return len(documents)
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            if any(error["code"] != 11000 for error in write_errors):
+                raise
+            return len(documents) - len(write_errors)
+
+    @staticmethod
+    async def record_error_rollups(batch_id: str, conversations: List[ConversationHistoryModel]) -> None:
+        """
+        Adds a batch of conversations' errors to the daily error rollups in one bulk_write.
+        batch_id must be the same when the batch is retried: each rollup applies it once.
+        """
+        if not settings.ERROR_ROLLUPS_ENABLED:
+            return
+        increments: Dict[tuple, Dict[str, int]] = {}
+        for conversation in conversations:
+            day = conversation.created_at.replace(hour=0, minute=0, second=0, microsecond=0)
+            counts = increments.setdefault((conversation.user_id, day), {})
+            for error in conversation.errors:
+                key = _error_rollup_field(error.error_type)
+                counts[key] = counts.get(key, 0) + 1
+        operations = [
+            UpdateOne(
+                {"user_id": user_id, "day": day, "applied_batches": {"$ne": batch_id}},
+                {
+                    "$inc": counts,
+                    "$push": {"applied_batches": {"$each": [batch_id], "$slice": -APPLIED_BATCHES_KEPT}}
+                },
+                upsert=True
+            )
+            for (user_id, day), counts in increments.items() if counts
+        ]
+        if operations:
+            db = await get_database()
+            await _guarded_bulk_write(db.error_rollups, operations)
+    
     @staticmethod
     async def get_user_conversations(user_id: str, limit: int = 50) -> List[ConversationHistoryModel]:
         db = await get_database()
@@ -56,63 +209,175 @@ class ConversationRepository:
         return [ConversationHistoryModel(**conv) for conv in conversations]
     
     @staticmethod
-    async def get_recent_errors(user_id: str, days: int = 7) -> List[Dict]:
-        """Get recent error patterns for analysis"""
+    async def get_recent_errors(user_id: str, days: int = 7) -> Dict[str, int]:
+        """Get recent error patterns for analysis - counted server-side, only counts come back"""
         db = await get_database()
         date_threshold = datetime.utcnow() - timedelta(days=days)
-        cursor = db.conversations.find({
-            "user_id": user_id,
-            "created_at": {"$gte": date_threshold}
-        })
-        conversations = await cursor.to_list(length=100)
-        
+        cursor = db.conversations.aggregate([
+            {"$match": {"user_id": user_id, "created_at": {"$gte": date_threshold}}},
+            {"$project": {"_id": 0, "errors.error_type": 1}},
+            {"$unwind": "$errors"},
+            {"$group": {"_id": {"$ifNull": ["$errors.error_type", "other"]}, "count": {"$sum": 1}}}
+        ])
+        return {group["_id"]: group["count"] async for group in cursor}
+
+    @staticmethod
+    async def record_error_rollup(user_id: str, error_types: List[str], when: datetime = None) -> bool:
+        """Add a conversation's errors to the user's per-day error counts"""
+        db = await get_database()
+        day = (when or datetime.utcnow()).replace(hour=0, minute=0, second=0, microsecond=0)
+
+        increments = {}
+        for error_type in error_types:
+            key = _error_rollup_field(error_type)
+            increments[key] = increments.get(key, 0) + 1
+        if not increments:
+            return False
+
+        result = await db.error_rollups.update_one(
+            {"user_id": user_id, "day": day},
+            {"$inc": increments},
+            upsert=True
+        )
+        return result.modified_count > 0 or result.upserted_id is not None
+
+    @staticmethod
+    async def get_error_rollup(user_id: str, days: int = 7) -> Dict[str, int]:
+        """
+        Error counts for the last `days` days from the precomputed daily rollups -
+        at most `days` small documents, however much the user practised
+        """
+        db = await get_database()
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        cursor = db.error_rollups.find(
+            {"user_id": user_id, "day": {"$gte": today - timedelta(days=days - 1)}},
+            {"_id": 0, "counts": 1}
+        )
+
         error_counts = {}
-        for conv in conversations:
-            for error in conv.get("errors", []):
-                error_type = error.get("error_type", "other")
-                error_counts[error_type] = error_counts.get(error_type, 0) + 1
-        
+        async for rollup in cursor:
+            for error_type, count in rollup.get("counts", {}).items():
+                error_counts[error_type] = error_counts.get(error_type, 0) + count
         return error_counts
 
 
 class ProgressRepository:
     @staticmethod
-    async def get_or_create_progress(user_id: str) -> ProgressTrackingModel:
+    async def get_or_create_progress(
+        user_id: str,
+        view: Optional[Type[ModelT]] = None
+    ) -> Union[ProgressTrackingModel, ModelT]:
+        """Returns the user's progress, or only the fields of a view model (e.g. ProgressStatsView) if one is passed"""
         db = await get_database()
-        progress_data = await db.progress.find_one({"user_id": user_id})
+        progress_data = await db.progress.find_one({"user_id": user_id}, _projection(view) if view else None)
         
-        if progress_data:
-            return ProgressTrackingModel(**progress_data)
+        if progress_data is not None:
+            return view.model_validate(progress_data) if view else _model(ProgressTrackingModel, progress_data)
         else:
             # Create new progress tracking
             new_progress = ProgressTrackingModel(user_id=user_id)
-            await db.progress.insert_one(new_progress.dict(by_alias=True, exclude={"id"}))
-            return new_progress
+            await db.progress.insert_one(to_document(new_progress))
+            return view.model_validate(new_progress.model_dump()) if view else new_progress
     
+    @staticmethod
+    def pronunciation_update_pipeline(phoneme: str, score: float, now: datetime = None) -> List[Dict]:
+        """
+        Aggregation-pipeline update folding one score into a phoneme's progress:
+        a fixed-size window of recent scores plus running count / sum / sum of
+        squares / EMA, so the document stays the same size however long the
+        user practises. The first stage seeds the running stats from the
+        unbounded score lists written by older versions.
+        """
+        now = now or datetime.utcnow()
+        key = f"pronunciation_progress.{phoneme}"
+        field = f"$pronunciation_progress.{phoneme}"
+        alpha = settings.PRONUNCIATION_EMA_ALPHA
+        legacy_scores = {"$ifNull": [f"{field}.scores", []]}
+        ema = {"$ifNull": [f"{field}.ema", None]}
+        mean = {"$divide": [f"{field}.total", f"{field}.count"]}
+
+        return [
+            {"$set": {
+                f"{key}.count": {"$ifNull": [f"{field}.count", {"$size": legacy_scores}]},
+                f"{key}.total": {"$ifNull": [f"{field}.total", {"$sum": legacy_scores}]},
+                f"{key}.total_sq": {"$ifNull": [f"{field}.total_sq", {"$reduce": {
+                    "input": legacy_scores,
+                    "initialValue": 0,
+                    "in": {"$add": ["$$value", {"$multiply": ["$$this", "$$this"]}]}
+                }}]},
+                f"{key}.ema": {"$ifNull": [f"{field}.ema", {"$avg": legacy_scores}]},
+            }},
+            {"$set": {
+                f"{key}.phoneme": phoneme,
+                f"{key}.count": {"$add": [f"{field}.count", 1]},
+                f"{key}.total": {"$add": [f"{field}.total", score]},
+                f"{key}.total_sq": {"$add": [f"{field}.total_sq", score * score]},
+                f"{key}.ema": {"$cond": [
+                    {"$eq": [ema, None]},
+                    score,
+                    {"$add": [{"$multiply": [1 - alpha, ema]}, alpha * score]}
+                ]},
+                f"{key}.scores": {"$slice": [
+                    {"$concatArrays": [legacy_scores, [score]]},
+                    -settings.PRONUNCIATION_SCORE_WINDOW
+                ]},
+                f"{key}.last_practice_date": now,
+                "updated_at": now
+            }},
+            # Improvement: the recency-weighted average (EMA) against the all-time mean, in percent
+            {"$set": {
+                f"{key}.improvement_percentage": {"$cond": [
+                    {"$gt": [f"{field}.total", 0]},
+                    {"$round": [{"$multiply": [
+                        {"$divide": [{"$subtract": [f"{field}.ema", mean]}, mean]}, 100
+                    ]}, 1]},
+                    0.0
+                ]}
+            }}
+        ]
+
     @staticmethod
     async def update_pronunciation_progress(user_id: str, phoneme: str, score: float) -> bool:
+        """Fold a phoneme score into the user's progress in a single upserting write"""
         db = await get_database()
-        
-        # Get current progress
-        progress = await ProgressRepository.get_or_create_progress(user_id)
-        
-        # Update phoneme-specific progress
-        phoneme_key = f"pronunciation_progress.{phoneme}"
         result = await db.progress.update_one(
             {"user_id": user_id},
-            {
-                "$push": {f"{phoneme_key}.scores": score},
-                "$set": {
-                    f"{phoneme_key}.last_practice_date": datetime.utcnow(),
-                    f"{phoneme_key}.phoneme": phoneme,
-                    "updated_at": datetime.utcnow()
-                }
-            },
+            ProgressRepository.pronunciation_update_pipeline(phoneme, score),
             upsert=True
         )
         
         return result.modified_count > 0 or result.upserted_id is not None
     
+    @staticmethod
+    async def record_turns(batch_id: str, turns_by_user: Dict[str, Dict]) -> None:
+        """
+        Applies a batch of completed turns to progress in one bulk_write, one
+        pipeline update per user (conversation count, then each phoneme score).
+        turns_by_user: {user_id: {"conversations": int, "phoneme_scores": [(phoneme, score), ...]}}
+        batch_id must be the same when the batch is retried: each user's update applies it once.
+        """
+        now = datetime.utcnow()
+        operations = []
+        for user_id, turns in turns_by_user.items():
+            pipeline = [{"$set": {
+                "total_conversations": {"$add": [{"$ifNull": ["$total_conversations", 0]}, turns["conversations"]]},
+                "updated_at": now,
+                "applied_batches": {"$slice": [
+                    {"$concatArrays": [{"$ifNull": ["$applied_batches", []]}, [batch_id]]},
+                    -APPLIED_BATCHES_KEPT
+                ]}
+            }}]
+            for phoneme, score in turns["phoneme_scores"]:
+                pipeline.extend(ProgressRepository.pronunciation_update_pipeline(phoneme, score, now))
+            operations.append(UpdateOne(
+                {"user_id": user_id, "applied_batches": {"$ne": batch_id}},
+                pipeline,
+                upsert=True
+            ))
+        if operations:
+            db = await get_database()
+            await _guarded_bulk_write(db.progress, operations)
+    
     @staticmethod
     async def increment_conversation_count(user_id: str) -> bool:
         db = await get_database()
@@ -141,119 +406,170 @@ class AchievementRepository:
         if existing:
             return str(existing["_id"])  # Already earned
         
-        result = await db.achievements.insert_one(achievement.dict(by_alias=True, exclude={"id"}))
+        result = await db.achievements.insert_one(to_document(achievement))
         return str(result.inserted_id)
     
     @staticmethod
-    async def get_user_achievements(user_id: str) -> List[AchievementModel]:
+    async def get_earned_types(user_id: str) -> Set[str]:
         db = await get_database()
-        cursor = db.achievements.find({"user_id": user_id}).sort("earned_at", -1)
+        # Covered by the (user_id, achievement_type) unique index
+        cursor = db.achievements.find({"user_id": user_id}, {"_id": 0, "achievement_type": 1})
+        return {doc["achievement_type"] for doc in await cursor.to_list(length=None)}
+    
+    @staticmethod
+    async def award_achievements(achievements: List[AchievementModel]) -> List[AchievementModel]:
+        """
+        Inserts several achievements in one insert_many.
+        Ones the user already has are rejected by the unique index and left out of the result.
+        """
+        if not achievements:
+            return []
+        db = await get_database()
+        try:
+            await db.achievements.insert_many(
+                [to_document(achievement) for achievement in achievements],
+                ordered=False
+            )
+            return achievements
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            if any(error["code"] != 11000 for error in write_errors):
+                raise
+            duplicates = {error["index"] for error in write_errors}
+            return [a for i, a in enumerate(achievements) if i not in duplicates]
+    
+    @staticmethod
+    async def get_user_achievements(
+        user_id: str,
+        view: Optional[Type[ModelT]] = None
+    ) -> List[Union[AchievementModel, ModelT]]:
+        """The user's achievements, newest first, or only the fields of a view model (e.g. AchievementView)"""
+        db = await get_database()
+        cursor = db.achievements.find({"user_id": user_id}, _projection(view) if view else None).sort("earned_at", -1)
         achievements = await cursor.to_list(length=100)
-        return [AchievementModel(**ach) for ach in achievements]
+        if view is not None:
+            return [view.model_validate(ach) for ach in achievements]
+        return [_model(AchievementModel, ach) for ach in achievements]
 
 
 class StreakRepository:
+    # Days covered by the users.streak_days bitset (bit 0 = streak_last_day); fits a signed 64-bit long
+    WINDOW_DAYS = 62
+
+    @staticmethod
+    def streak_update_pipeline(today: int, now: datetime) -> List[Dict]:
+        """
+        Aggregation-pipeline update applying one day of practice to a user's streak:
+        streak_last_day (days since the epoch) and streak_days (rolling bitset of
+        practice days) decide whether the streak continues, resets or is unchanged.
+        Users from before these fields fall back to last_practice_date.
+        Only streak state is stored; whether this practice kept the streak going
+        is derived from the previous document (see streak_after).
+        """
+        window = StreakRepository.WINDOW_DAYS
+        legacy_day = {"$floor": {"$divide": [{"$toLong": "$last_practice_date"}, 86400000]}}
+        gap = "$_streak_gap"
+        shift = {"$toLong": {"$pow": [2, gap]}}
+        return [
+            {"$set": {"_streak_gap": {"$subtract": [today, {"$ifNull": ["$streak_last_day", legacy_day]}]}}},
+            {"$set": {
+                "current_streak": {"$switch": {
+                    "branches": [
+                        {"case": {"$eq": [gap, None]}, "then": 1},
+                        {"case": {"$lte": [gap, 0]}, "then": {"$max": [{"$ifNull": ["$current_streak", 1]}, 1]}},
+                        {"case": {"$eq": [gap, 1]}, "then": {"$add": [{"$ifNull": ["$current_streak", 0]}, 1]}}
+                    ],
+                    "default": 1
+                }},
+                "streak_days": {"$switch": {
+                    "branches": [
+                        {"case": {"$eq": [gap, None]}, "then": 1},
+                        {"case": {"$lte": [gap, 0]}, "then": {"$ifNull": ["$streak_days", 1]}},
+                        {"case": {"$lt": [gap, window]}, "then": {"$add": [
+                            {"$multiply": [
+                                {"$mod": [{"$toLong": {"$ifNull": ["$streak_days", 0]}},
+                                          {"$toLong": {"$pow": [2, {"$subtract": [window, gap]}]}}]},
+                                shift
+                            ]},
+                            1
+                        ]}}
+                    ],
+                    "default": 1
+                }},
+                "streak_last_day": {"$max": [today, {"$ifNull": ["$streak_last_day", today]}]},
+                "last_practice_date": now
+            }},
+            {"$set": {"longest_streak": {"$max": [{"$ifNull": ["$longest_streak", 0]}, "$current_streak"]}}},
+            # streak_maintained was stored by an earlier version of this pipeline
+            {"$unset": ["_streak_gap", "streak_maintained"]}
+        ]
+
+    @staticmethod
+    def streak_after(before: Dict, today: int) -> Dict:
+        """
+        What streak_update_pipeline leaves in a user document, from the document
+        it was applied to, plus whether the streak was maintained
+        """
+        last_day = before.get("streak_last_day")
+        if last_day is None and before.get("last_practice_date") is not None:
+            last_day = (before["last_practice_date"] - datetime(1970, 1, 1)).days
+        gap = None if last_day is None else today - last_day
+
+        current = before.get("current_streak")
+        if gap is None or gap > 1:
+            current_streak = 1
+        elif gap <= 0:
+            current_streak = max(1 if current is None else current, 1)
+        else:
+            current_streak = (current or 0) + 1
+        return {
+            "current_streak": current_streak,
+            "longest_streak": max(before.get("longest_streak") or 0, current_streak),
+            "streak_maintained": gap is None or gap <= 1
+        }
+
     @staticmethod
     async def update_streak(user_id: str) -> Dict:
-        """Update user's streak and return current streak info"""
+        """Update user's streak and return current streak info - one atomic write to users"""
         db = await get_database()
         now = datetime.utcnow()
-        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        today = (now - datetime(1970, 1, 1)).days
         
-        streak_data = await db.streaks.find_one({"user_id": user_id})
-        
-        if not streak_data:
-            # First time practicing
-            new_streak = StreakModel(
-                user_id=user_id,
-                current_streak=1,
-                longest_streak=1,
-                last_practice_date=now,
-                streak_history=[today]
-            )
-            await db.streaks.insert_one(new_streak.dict(by_alias=True, exclude={"id"}))
-            return {"current_streak": 1, "longest_streak": 1, "streak_maintained": True}
-        
-        last_practice = streak_data.get("last_practice_date")
-        if last_practice:
-            last_practice_day = last_practice.replace(hour=0, minute=0, second=0, microsecond=0)
-            
-            if last_practice_day == today:
-                # Already practiced today
-                return {
-                    "current_streak": streak_data.get("current_streak", 1),
-                    "longest_streak": streak_data.get("longest_streak", 1),
-                    "streak_maintained": True
-                }
-            elif last_practice_day == today - timedelta(days=1):
-                # Practiced yesterday, increment streak
-                new_current = streak_data.get("current_streak", 0) + 1
-                new_longest = max(new_current, streak_data.get("longest_streak", 0))
-                
-                await db.streaks.update_one(
-                    {"user_id": user_id},
-                    {
-                        "$set": {
-                            "current_streak": new_current,
-                            "longest_streak": new_longest,
-                            "last_practice_date": now
-                        },
-                        "$push": {"streak_history": today}
-                    }
-                )
-                
-                # Also update user model
-                await db.users.update_one(
-                    {"firebase_uid": user_id},
-                    {
-                        "$set": {
-                            "current_streak": new_current,
-                            "longest_streak": new_longest,
-                            "last_practice_date": now
-                        }
-                    }
-                )
-                
-                return {"current_streak": new_current, "longest_streak": new_longest, "streak_maintained": True}
-            else:
-                # Streak broken, reset
-                await db.streaks.update_one(
-                    {"user_id": user_id},
-                    {
-                        "$set": {
-                            "current_streak": 1,
-                            "last_practice_date": now
-                        },
-                        "$push": {"streak_history": today}
-                    }
-                )
-                
-                await db.users.update_one(
-                    {"firebase_uid": user_id},
-                    {"$set": {"current_streak": 1, "last_practice_date": now}}
-                )
-                
-                return {
-                    "current_streak": 1,
-                    "longest_streak": streak_data.get("longest_streak", 1),
-                    "streak_maintained": False
-                }
+        # The document as it was before this write: the new streak follows from it
+        before = await db.users.find_one_and_update(
+            {"firebase_uid": user_id},
+            StreakRepository.streak_update_pipeline(today, now),
+            projection={
+                "_id": 0, "current_streak": 1, "longest_streak": 1,
+                "streak_last_day": 1, "last_practice_date": 1
+            },
+            return_document=ReturnDocument.BEFORE
+        )
+        if not before:
+            return {"current_streak": 0, "longest_streak": 0, "streak_maintained": False}
         
-        return {"current_streak": 1, "longest_streak": 1, "streak_maintained": True}
+        streak = StreakRepository.streak_after(before, today)
+        leaderboard_index.update_streak(user_id, streak["current_streak"])
+        return streak
 
 
 class LeaderboardRepository:
     @staticmethod
-    async def get_global_leaderboard(limit: int = 100) -> List[LeaderboardEntry]:
+    async def get_global_leaderboard(limit: int = 100, country: Optional[str] = None) -> List[LeaderboardEntry]:
+        """Top users globally or within one country - from memory once the index is loaded"""
+        if leaderboard_index.loaded:
+            return [LeaderboardEntry(**entry) for entry in leaderboard_index.top(limit, country)]
+
         db = await get_database()
-        cursor = db.users.find().sort("total_points", -1).limit(limit)
+        query = {"settings.country": country} if country else {}
+        cursor = db.users.find(query, LEADERBOARD_PROJECTION).sort("total_points", -1).limit(limit)
         users = await cursor.to_list(length=limit)
         
         leaderboard = []
         for rank, user in enumerate(users, start=1):
             entry = LeaderboardEntry(
                 user_id=user.get("firebase_uid"),
-                display_name=user.get("display_name", "Anonymous"),
+                display_name=user.get("display_name") or "Anonymous",
                 total_points=user.get("total_points", 0),
                 current_streak=user.get("current_streak", 0),
                 rank=rank,
@@ -267,11 +583,30 @@ class LeaderboardRepository:
     @staticmethod
     async def get_user_rank(user_id: str) -> Optional[int]:
         """Get user's current rank"""
+        standing = await LeaderboardRepository.get_user_standing(user_id)
+        return standing["rank"] if standing else None
+
+    @staticmethod
+    async def get_user_standing(user_id: str, country: Optional[str] = None) -> Optional[Dict]:
+        """
+        Get user's rank, the number of ranked users and the "top X%" percentile,
+        globally or within one country
+        """
+        if leaderboard_index.loaded:
+            return leaderboard_index.standing(user_id, country)
+
         db = await get_database()
-        user = await db.users.find_one({"firebase_uid": user_id})
+        user = await db.users.find_one({"firebase_uid": user_id}, {"_id": 0, "total_points": 1})
         if not user:
             return None
         
+        scope = {"settings.country": country} if country else {}
         user_points = user.get("total_points", 0)
-        count = await db.users.count_documents({"total_points": {"$gt": user_points}})
-        return count + 1
+        count = await db.users.count_documents({**scope, "total_points": {"$gt": user_points}})
+        total = await db.users.count_documents(scope)
+        rank = count + 1
+        return {
+            "rank": rank,
+            "total_users": total,
+            "percentile": round(100.0 * rank / total, 1) if total else 100.0
+        }
@@ -2,7 +2,14 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from core.config import settings
+from core.serialization import ORJSONResponse
 from database.mongo import db
+from database.leaderboard import leaderboard_index
+from core.executors import provider_executors
+from services.voice_catalog import voice_catalog
+from services.turn_events import turn_events
+from middleware.auth_middleware import firebase_key_ring
+from middleware.upload_limit import AudioUploadLimitMiddleware
 from api.conversation import router as conversation_router
 from api.gamification import router as gamification_router
 from api.personality import router as personality_router
@@ -13,11 +20,25 @@ import os
 async def lifespan(app: FastAPI):
     # Startup
     db.connect()
+    await db.bootstrap_indexes()
+    leaderboard_index.start(db.get_db(), settings.LEADERBOARD_REBUILD_SECONDS)
+    voice_catalog.start()
+    firebase_key_ring.start()
+    turn_events.start()
     yield
     # Shutdown
+    await turn_events.stop(timeout=settings.TURN_EVENT_DRAIN_TIMEOUT_SECONDS)
+    await firebase_key_ring.stop()
+    await voice_catalog.stop()
+    await leaderboard_index.stop()
+    provider_executors.shutdown()
     db.close()
 
-app = FastAPI(title="Language Learning Companion API", lifespan=lifespan)
+app = FastAPI(title="Language Learning Companion API", lifespan=lifespan, default_response_class=ORJSONResponse)
+
+# Oversized audio uploads are refused while their body is received. Added before
+# CORS so it sits inside it and its 413s still carry CORS headers
+app.add_middleware(AudioUploadLimitMiddleware, paths=["/api/v1/conversation/audio"])
 
 # CORS Middleware - MUST be before routes
 # Allow frontend URLs (both local and production)
@@ -1,8 +1,18 @@
 from fastapi import Header, HTTPException, Depends
 import firebase_admin
 from firebase_admin import auth, credentials
+from google.auth import jwt as google_jwt
+from google.auth.transport.requests import Request as GoogleAuthRequest
+from core.cache import TTLCache, SingleFlight
 from core.config import settings
+from core.executors import run_blocking
+from typing import Dict, Optional
+import asyncio
+import hashlib
+import json
 import os
+import re
+import time
 
 # Initialize Firebase Admin SDK
 if not firebase_admin._apps:
@@ -22,6 +32,139 @@ if not firebase_admin._apps:
             print("WARNING: Firebase Admin SDK not initialized - no service account key found")
 
 
+FIREBASE_CERTS_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+
+
+class FirebaseKeyRing:
+    """
+    Public certificates Firebase signs ID tokens with, fetched by a background
+    task ahead of their Cache-Control expiry so verification never waits on
+    the network (except once, if a token arrives signed with a brand-new key).
+    Refreshes forced by unknown key ids are rate-limited: anyone can send a
+    token with a made-up kid, and each one must not cost a cert download.
+    """
+
+    def __init__(self, min_forced_refresh_seconds: float):
+        self.certs: Dict[str, str] = {}
+        self.min_forced_refresh_seconds = min_forced_refresh_seconds
+        self._expires_at = 0.0
+        self._refreshed_at = float("-inf")
+        self._refreshing = SingleFlight()
+        self._refresher: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.certs)
+
+    def _fetch(self):
+        response = GoogleAuthRequest()(url=FIREBASE_CERTS_URL, method="GET")
+        if response.status != 200:
+            raise ValueError(f"Could not fetch Firebase certificates (HTTP {response.status})")
+        match = re.search(r"max-age=(\d+)", response.headers.get("cache-control", ""))
+        max_age = int(match.group(1)) if match else 3600
+        return json.loads(response.data.decode("utf-8")), max_age
+
+    async def refresh(self):
+        await self._refreshing.do("certs", self._refresh)
+
+    async def has_key(self, kid: Optional[str]) -> bool:
+        """
+        Whether a key id is known, refreshing first if it isn't (keys may have been
+        rotated) - at most once per min_forced_refresh_seconds
+        """
+        if kid in self.certs:
+            return True
+        if time.monotonic() - self._refreshed_at >= self.min_forced_refresh_seconds:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Error refreshing Firebase certificates: {e}")
+        return kid in self.certs
+
+    async def _refresh(self):
+        # Stamped before the fetch, so failed fetches count against the rate limit too
+        self._refreshed_at = time.monotonic()
+        certs, max_age = await run_blocking("auth", self._fetch)
+        self.certs = certs
+        self._expires_at = time.time() + max_age
+
+    async def _refresh_forever(self):
+        while True:
+            try:
+                await self.refresh()
+                # Refresh well before Google rotates the keys out
+                delay = max(60.0, (self._expires_at - time.time()) * 0.8)
+            except Exception as e:
+                print(f"Error refreshing Firebase certificates: {e}")
+                delay = 30.0
+            await asyncio.sleep(delay)
+
+    def start(self):
+        if self._refresher is None and firebase_admin._apps:
+            self._refresher = asyncio.create_task(self._refresh_forever())
+
+    async def stop(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+
+
+firebase_key_ring = FirebaseKeyRing(min_forced_refresh_seconds=settings.AUTH_CERT_MIN_REFRESH_SECONDS)
+
+# Decoded claims of verified tokens by sha256(token), each kept until the token's exp
+_verified_tokens = TTLCache(maxsize=settings.AUTH_TOKEN_CACHE_SIZE, ttl=3600)
+
+
+def _firebase_project_id() -> Optional[str]:
+    if not firebase_admin._apps:
+        return None
+    return firebase_admin.get_app().project_id
+
+
+def _decode_id_token(token: str, certs: Dict[str, str], project_id: str) -> Dict:
+    """
+    Same checks as firebase_admin's verify_id_token (signature, exp/iat, aud, iss, sub),
+    against certificates we already hold. CPU-bound, so it runs on the auth pool.
+    """
+    if google_jwt.decode_header(token).get("alg") != "RS256":
+        raise ValueError("Firebase ID token has incorrect algorithm")
+    claims = google_jwt.decode(token, certs=certs, audience=project_id)
+    if claims.get("iss") != f"https://securetoken.google.com/{project_id}":
+        raise ValueError("Firebase ID token has incorrect issuer")
+    if not claims.get("sub") or len(claims["sub"]) > 128:
+        raise ValueError("Firebase ID token has invalid subject")
+    claims["uid"] = claims["sub"]
+    return claims
+
+
+async def verify_id_token(token: str) -> Dict:
+    """
+    Verifies a Firebase ID token and returns its claims.
+    Repeat verifications of the same token are served from memory.
+    """
+    cache_key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    claims = _verified_tokens.get(cache_key)
+    if claims is not None:
+        return claims
+
+    project_id = _firebase_project_id()
+    if project_id and firebase_key_ring.ready:
+        if not await firebase_key_ring.has_key(google_jwt.decode_header(token).get("kid")):
+            raise ValueError("Firebase ID token signed with an unknown key")
+        claims = await run_blocking("auth", _decode_id_token, token, firebase_key_ring.certs, project_id)
+    else:
+        claims = await run_blocking("auth", auth.verify_id_token, token)
+
+    ttl = claims.get("exp", 0) - time.time()
+    if ttl > 0:
+        _verified_tokens.set(cache_key, claims, ttl=ttl)
+    return claims
+
+
 async def verify_firebase_token(authorization: str = Header(None)):
     """
     Verify Firebase ID token from Authorization header
@@ -38,7 +181,7 @@ async def verify_firebase_token(authorization: str = Header(None)):
             token = authorization
         
         # Verify the token
-        decoded_token = auth.verify_id_token(token)
+        decoded_token = await verify_id_token(token)
         user_uid = decoded_token['uid']
         
         return user_uid
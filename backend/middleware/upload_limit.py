@@ -0,0 +1,67 @@
+from typing import Iterable
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from core.serialization import ORJSONResponse
+from services.audio_ingestion import AudioRejectedError, audio_ingestion
+
+
+class AudioUploadLimitMiddleware:
+    """
+    Caps audio upload request bodies before the route (and Starlette's
+    multipart parser, which spools the whole body) sees them:
+    - a Content-Length over the limit is answered with 413 without reading the body;
+    - otherwise (e.g. chunked uploads) the received bytes are counted, and once
+      they pass the limit the body is cut off and the response replaced with 413.
+    Register it inside CORSMiddleware so its 413s carry CORS headers.
+    """
+
+    def __init__(self, app: ASGIApp, paths: Iterable[str]):
+        self.app = app
+        self.paths = set(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        try:
+            audio_ingestion.check_content_length(int(content_length) if content_length else None)
+        except ValueError:
+            await self._reject(scope, receive, send, 400, "Invalid Content-Length")
+            return
+        except AudioRejectedError as e:
+            await self._reject(scope, receive, send, e.status_code, str(e))
+            return
+
+        limit = audio_ingestion.max_request_bytes
+        too_large = f"Audio upload exceeds {audio_ingestion.max_bytes} bytes"
+        state = {"received": 0, "exceeded": False, "rejected": False}
+
+        async def limited_receive() -> Message:
+            if state["exceeded"]:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                state["received"] += len(message.get("body", b""))
+                if state["received"] > limit:
+                    # The parser sees a disconnect instead of the rest of the body
+                    state["exceeded"] = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def limited_send(message: Message):
+            if not state["exceeded"]:
+                await send(message)
+            elif message["type"] == "http.response.start" and not state["rejected"]:
+                # Whatever the route made of the cut-off body, the answer is 413
+                state["rejected"] = True
+                await self._reject(scope, receive, send, 413, too_large)
+
+        await self.app(scope, limited_receive, limited_send)
+        if state["exceeded"] and not state["rejected"]:
+            await self._reject(scope, receive, send, 413, too_large)
+
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send, status_code: int, message: str):
+        response = ORJSONResponse(status_code=status_code, content={"message": message})
+        await response(scope, receive, send)
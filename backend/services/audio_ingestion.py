@@ -0,0 +1,88 @@
+import hashlib
+from typing import Optional
+from fastapi import UploadFile
+from core.config import settings
+from services.audio_preprocessing import sniff_container
+
+# Enough of the first chunk to recognize every container in audio_preprocessing
+_SNIFF_BYTES = 16
+
+
+class AudioRejectedError(Exception):
+    """Raised when an upload is too large, empty or not audio we can recognize"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class IngestedAudio:
+    """
+    One upload read into a single buffer.
+    content is a memoryview over that buffer: slicing it (sniffing, hashing) doesn't copy.
+    digest is the SHA-256 of the content, computed while it was read.
+    """
+
+    def __init__(self, buffer: bytearray, size: int, digest: str, container: str):
+        self.content = memoryview(buffer)[:size]
+        self.size = size
+        self.digest = digest
+        self.container = container
+
+
+class AudioIngestion:
+    """
+    Reads uploads in fixed-size chunks with a hard size cap, so a large or
+    malicious upload can't grow worker memory past max_bytes. The container is
+    checked on the first chunk, before the rest is read.
+    The request body itself is capped earlier, while it is received, by
+    AudioUploadLimitMiddleware.
+    """
+
+    def __init__(self, max_bytes: int, chunk_bytes: int):
+        self.max_bytes = max_bytes
+        self.chunk_bytes = chunk_bytes
+
+    @property
+    def max_request_bytes(self) -> int:
+        # The multipart envelope adds a little to the audio itself
+        return self.max_bytes + self.chunk_bytes
+
+    def check_content_length(self, content_length: Optional[int]):
+        if content_length is not None and content_length > self.max_request_bytes:
+            raise AudioRejectedError(413, f"Audio upload exceeds {self.max_bytes} bytes")
+
+    async def ingest(self, upload: UploadFile) -> IngestedAudio:
+        if upload.size is not None and upload.size > self.max_bytes:
+            raise AudioRejectedError(413, f"Audio upload exceeds {self.max_bytes} bytes")
+
+        # Starlette already spooled the upload (to disk past 1 MB); this is the one copy in memory
+        buffer = bytearray(upload.size or self.chunk_bytes)
+        digest = hashlib.sha256()
+        size = 0
+        container = None
+
+        while True:
+            chunk = await upload.read(self.chunk_bytes)
+            if not chunk:
+                break
+            if size == 0:
+                container = sniff_container(chunk[:_SNIFF_BYTES])
+                if container is None:
+                    raise AudioRejectedError(415, "Unsupported audio format")
+            end = size + len(chunk)
+            if end > self.max_bytes:
+                raise AudioRejectedError(413, f"Audio upload exceeds {self.max_bytes} bytes")
+            if end > len(buffer):
+                # Size unknown up front: grow geometrically, capped at the limit
+                buffer.extend(bytes(min(max(end, len(buffer) * 2), self.max_bytes) - len(buffer)))
+            buffer[size:end] = chunk
+            digest.update(chunk)
+            size = end
+
+        if size == 0:
+            raise AudioRejectedError(400, "Empty audio upload")
+        return IngestedAudio(buffer, size, digest.hexdigest(), container)
+
+
+audio_ingestion = AudioIngestion(settings.AUDIO_UPLOAD_MAX_BYTES, settings.AUDIO_UPLOAD_CHUNK_BYTES)
@@ -0,0 +1,261 @@
+import io
+import struct
+import wave
+from typing import Dict, Optional, Tuple, Union
+import numpy as np
+from core.config import settings
+from core.executors import run_blocking
+
+try:
+    import av
+except ImportError:  # In requirements.txt; without it only WAV uploads are decoded locally
+    av = None
+    print("WARNING: PyAV (av) is not installed - WebM/Ogg/FLAC/MP3 uploads go to STT without "
+          "voice-activity detection or trimming")
+
+# Google STT encoding for each container we can recognize
+CONTAINER_ENCODINGS = {
+    "webm": "WEBM_OPUS",
+    "ogg": "OGG_OPUS",
+    "wav": "LINEAR16",
+    "flac": "FLAC",
+    "mp3": "MP3",
+}
+
+VAD_RATE = 16000  # Compressed audio is decoded at this rate for voice-activity detection
+_FRAME_SECONDS = 0.02
+_MIN_SPEECH_FRAMES = 5
+
+
+def sniff_container(data: bytes) -> Optional[str]:
+    """Container from the first bytes of a file, or None if it isn't one we know"""
+    if data[:4] == b"\x1a\x45\xdf\xa3":
+        return "webm"  # EBML (WebM / Matroska)
+    if data[:4] == b"OggS":
+        return "ogg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        return "wav"
+    if data[:4] == b"fLaC":
+        return "flac"
+    # MPEG frame sync (11 bits) with layer bits 01 (Layer III); ADTS AAC has layer 00
+    if data[:3] == b"ID3" or (len(data) > 1 and data[0] == 0xFF and data[1] & 0xE6 == 0xE2):
+        return "mp3"
+    return None
+
+
+def sniff_sample_rate(data: bytes, container: Optional[str]) -> Optional[int]:
+    """Sample rate from the container header, without decoding"""
+    if container == "wav":
+        offset = 12
+        while offset + 8 <= len(data):
+            chunk_id, size = struct.unpack_from("<4sI", data, offset)
+            if chunk_id == b"fmt " and offset + 16 <= len(data):
+                return struct.unpack_from("<I", data, offset + 12)[0]
+            offset += 8 + size + (size & 1)
+    elif container == "flac" and len(data) >= 21:
+        # STREAMINFO: 20-bit sample rate after the 4-byte marker, 4-byte block header and 10 bytes
+        return int.from_bytes(data[18:21], "big") >> 4
+    elif container in ("webm", "ogg"):
+        if container == "ogg":
+            # Opus always decodes at 48 kHz; OpusHead's rate is only the encoder's input rate
+            # (often 44100), which Google rejects for OGG_OPUS
+            return 48000 if data.find(b"OpusHead") != -1 else None
+        # Matroska SamplingFrequency element (0xB5) holding a 4- or 8-byte float
+        for marker, fmt in ((b"\xb5\x88", ">d"), (b"\xb5\x84", ">f")):
+            index = data.find(marker, 0, 4096)
+            if index != -1:
+                return int(struct.unpack_from(fmt, data, index + 2)[0])
+        return 48000
+    return None
+
+
+def decode_pcm(data: bytes, container: Optional[str]) -> Optional[Tuple[np.ndarray, int]]:
+    """Mono int16 samples and their rate, or None if the audio can't be decoded here"""
+    if container == "wav":
+        try:
+            with wave.open(io.BytesIO(data)) as wav:
+                if wav.getsampwidth() != 2:
+                    return None
+                channels, rate = wav.getnchannels(), wav.getframerate()
+                samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2")
+        except (wave.Error, EOFError):
+            return None
+        if channels > 1:
+            samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+        return samples.astype(np.int16), rate
+
+    if av is None or container is None:
+        return None
+    try:
+        with av.open(io.BytesIO(data)) as source:
+            stream = source.streams.audio[0]
+            resampler = av.AudioResampler(format="s16", layout="mono", rate=VAD_RATE)
+            chunks = []
+            for frame in source.decode(stream):
+                chunks.extend(out.to_ndarray().reshape(-1) for out in resampler.resample(frame))
+            chunks.extend(out.to_ndarray().reshape(-1) for out in resampler.resample(None))
+    except (av.FFmpegError, IndexError, ValueError):
+        return None
+    samples = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int16)
+    return samples, VAD_RATE
+
+
+def detect_speech(samples: np.ndarray, rate: int, min_dbfs: float, padding_seconds: float) -> Optional[Tuple[float, float]]:
+    """
+    Energy-based voice-activity detection over 20 ms frames.
+    A frame is speech when it is louder than min_dbfs and clearly above the clip's
+    noise floor. Returns the (start, end) seconds of speech, padded, or None if silent.
+    """
+    frame = max(int(rate * _FRAME_SECONDS), 1)
+    count = len(samples) // frame
+    if count == 0:
+        return None
+    frames = samples[:count * frame].reshape(count, frame).astype(np.float32) / 32768.0
+    dbfs = 20 * np.log10(np.sqrt(np.mean(frames * frames, axis=1)) + 1e-10)
+
+    floor, peak = np.percentile(dbfs, 10), dbfs.max()
+    threshold = max(min_dbfs, min(floor + 10, peak - 20))
+    speech = np.flatnonzero(dbfs > threshold)
+    if len(speech) < _MIN_SPEECH_FRAMES:
+        return None
+
+    duration = len(samples) / rate
+    start = max(speech[0] * _FRAME_SECONDS - padding_seconds, 0.0)
+    end = min((speech[-1] + 1) * _FRAME_SECONDS + padding_seconds, duration)
+    return start, end
+
+
+def _encode_wav(samples: np.ndarray, rate: int) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+def _encode_flac(samples: np.ndarray, rate: int) -> bytes:
+    buffer = io.BytesIO()
+    with av.open(buffer, "w", format="flac") as output:
+        stream = output.add_stream("flac", rate=rate, layout="mono")
+        frame = av.AudioFrame.from_ndarray(samples.reshape(1, -1).astype(np.int16), format="s16", layout="mono")
+        frame.sample_rate = rate
+        for packet in stream.encode(frame):
+            output.mux(packet)
+        for packet in stream.encode(None):
+            output.mux(packet)
+    return buffer.getvalue()
+
+
+def _remux_opus(data: bytes, container: str, start: float, end: float) -> bytes:
+    # Stream-copies the Opus packets inside [start, end]: no re-encode, and the upload shrinks
+    buffer = io.BytesIO()
+    with av.open(io.BytesIO(data)) as source, av.open(buffer, "w", format=container) as output:
+        stream = source.streams.audio[0]
+        out_stream = output.add_stream_from_template(stream)
+        first_pts = None
+        for packet in source.demux(stream):
+            if packet.pts is None:
+                continue
+            seconds = float(packet.pts * stream.time_base)
+            if seconds < start or seconds > end:
+                continue
+            if first_pts is None:
+                first_pts = packet.pts
+            packet.pts -= first_pts
+            packet.dts = packet.pts
+            packet.stream = out_stream
+            output.mux(packet)
+    return buffer.getvalue()
+
+
+def preprocess_audio(data: bytes, min_dbfs: float, padding_seconds: float, min_trim_seconds: float) -> Dict:
+    """
+    Sniffs, decodes and voice-activity-detects one upload (CPU-bound: runs in the audio process pool)
+    Returns:
+        content, container, encoding, sample_rate: what to send to STT
+        duration_seconds, speech_seconds: None when the audio couldn't be decoded here
+        silent: no speech detected, don't send it
+        trimmed: content was cut down to the speech
+    """
+    container = sniff_container(data)
+    result = {
+        "content": data,
+        "container": container,
+        "encoding": CONTAINER_ENCODINGS.get(container),
+        "sample_rate": sniff_sample_rate(data, container),
+        "duration_seconds": None,
+        "speech_seconds": None,
+        "silent": False,
+        "trimmed": False,
+    }
+
+    decoded = decode_pcm(data, container)
+    if decoded is None:
+        return result
+    samples, rate = decoded
+    result["duration_seconds"] = len(samples) / rate
+
+    window = detect_speech(samples, rate, min_dbfs, padding_seconds)
+    if window is None:
+        result["silent"] = True
+        return result
+    start, end = window
+    result["speech_seconds"] = end - start
+    if result["duration_seconds"] - result["speech_seconds"] < min_trim_seconds:
+        return result
+
+    # Only worth a new upload when a significant amount of silence goes away
+    speech = samples[int(start * rate):int(end * rate)]
+    if container == "wav":
+        trimmed = {"content": _encode_wav(speech, rate), "sample_rate": rate}
+    elif container in ("webm", "ogg"):
+        trimmed = {"content": _remux_opus(data, container, start, end)}
+    else:
+        trimmed = {"content": _encode_flac(speech, rate), "container": "flac", "encoding": "FLAC", "sample_rate": rate}
+    # A lossless re-encode of lossy audio can come out bigger; then send the original
+    if len(trimmed["content"]) < len(data):
+        result.update(trimmed, trimmed=True)
+    return result
+
+
+class AudioPreprocessor:
+    """
+    Local stage before speech recognition: detects the real encoding and sample
+    rate, rejects silent clips without a network call, and trims leading and
+    trailing silence (which STT bills and spends time on).
+    """
+
+    async def prepare(self, data: Union[bytes, memoryview]) -> Dict:
+        # The STT request and the audio process pool both need bytes: materialize the upload once here
+        data = data if isinstance(data, bytes) else bytes(data)
+        container = sniff_container(data)
+        if container != "wav" and av is None:
+            # Nothing to decode with; still send the right encoding
+            return preprocess_audio(data, settings.AUDIO_VAD_MIN_DBFS, 0.0, float("inf"))
+        try:
+            return await run_blocking(
+                "audio",
+                preprocess_audio,
+                data,
+                settings.AUDIO_VAD_MIN_DBFS,
+                settings.AUDIO_VAD_PADDING_MS / 1000,
+                settings.AUDIO_TRIM_MIN_SECONDS
+            )
+        except Exception as e:
+            # Pre-processing is an optimization; recognition works without it
+            print(f"Audio pre-processing failed, sending upload as-is: {e}")
+            return {
+                "content": data,
+                "container": container,
+                "encoding": CONTAINER_ENCODINGS.get(container),
+                "sample_rate": sniff_sample_rate(data, container),
+                "duration_seconds": None,
+                "speech_seconds": None,
+                "silent": False,
+                "trimmed": False,
+            }
+
+
+audio_preprocessor = AudioPreprocessor()
@@ -0,0 +1,190 @@
+import base64
+from typing import Dict, List, Optional, Tuple
+from core.stage_graph import StageGraph, StageRun
+from services.speech_service import speech_service
+from services.audio_preprocessing import audio_preprocessor
+from services.gemini_service import gemini_service
+from services.elevenlabs_service import elevenlabs_service
+from services.pronunciation_service import pronunciation_service
+from services.scoring_engine import scoring_engine
+
+
+class UnrecognizedAudioError(Exception):
+    """Raised when speech recognition returned no transcript"""
+
+
+class ConversationPipeline:
+    """
+    One learner turn as a dependency graph of stages:
+
+        stt ─┬─ pronunciation ── prefix_audio ─┐
+             └─ gemini ───────── reply_audio ──┴─ response
+
+    The pronunciation prefix ("Great pronunciation!" or the feedback text) is
+    synthesized while Gemini is still thinking, instead of after it.
+
+    With stream_audio the TTS stages are skipped: the spoken texts are
+    registered with the TTS service and the response carries an audio_url
+    that streams the MP3 as it is synthesized, instead of base64 audio.
+    """
+
+    def __init__(self):
+        self.graph = StageGraph()
+        self.graph.add("stt", self._stt)
+        self.graph.add("pronunciation", self._pronunciation, ["stt"])
+        self.graph.add("prefix_audio", self._prefix_audio, ["pronunciation"])
+        self.graph.add("gemini", self._gemini, ["stt"])
+        self.graph.add("reply_audio", self._reply_audio, ["gemini"])
+        self.graph.add("response", self._response, ["pronunciation", "prefix_audio", "gemini", "reply_audio"])
+
+    async def process_audio(
+        self,
+        audio_content: memoryview,
+        personality: str = "friendly",
+        user_level: str = "intermediate",
+        voice_id: Optional[str] = None,
+        stream_audio: bool = False,
+        audio_digest: Optional[str] = None
+    ) -> StageRun:
+        """audio_digest: SHA-256 hex digest of audio_content, if already computed (see audio_ingestion)"""
+        return await self.graph.run(
+            audio_content=audio_content,
+            audio_digest=audio_digest,
+            personality=personality,
+            user_level=user_level,
+            voice_id=voice_id,
+            stream_audio=stream_audio
+        )
+
+    async def process_transcript(
+        self,
+        transcript: str,
+        word_confidences: List[Tuple[str, float]],
+        personality: str = "friendly",
+        user_level: str = "intermediate",
+        voice_id: Optional[str] = None,
+        stream_audio: bool = False,
+        word_timings: Optional[List[Tuple[str, float, float, float]]] = None
+    ) -> StageRun:
+        """Run the turn for an already recognized transcript (e.g. from streaming STT)"""
+        return await self.graph.run(
+            stt={"transcript": transcript, "word_confidences": word_confidences, "word_timings": word_timings or []},
+            personality=personality,
+            user_level=user_level,
+            voice_id=voice_id,
+            stream_audio=stream_audio
+        )
+
+    async def _stt(self, ctx: Dict) -> Dict:
+        audio = await audio_preprocessor.prepare(ctx["audio_content"])
+        if audio["silent"]:
+            # Rejected locally, without an STT round trip
+            raise UnrecognizedAudioError("No speech detected")
+        speech_result = await speech_service.transcribe_audio(
+            audio["content"],
+            encoding=audio["encoding"],
+            sample_rate=audio["sample_rate"],
+            # The upload's digest still describes the content unless it was trimmed
+            audio_digest=None if audio["trimmed"] else ctx["audio_digest"]
+        )
+        if not speech_result["transcript"]:
+            raise UnrecognizedAudioError("Could not recognize audio")
+        return speech_result
+
+    async def _pronunciation(self, ctx: Dict) -> Dict:
+        word_confidences = ctx["stt"]["word_confidences"]
+        # Timings weight words by duration and give speaking rate / pauses
+        metrics = scoring_engine.score_turn(ctx["stt"].get("word_timings") or word_confidences)
+        score = metrics["score"]
+        problematic_phonemes = pronunciation_service.identify_problematic_phonemes(word_confidences)
+        feedback = pronunciation_service.generate_pronunciation_feedback(score, problematic_phonemes)
+
+        prefix = None
+        if score >= 85:
+            prefix = "Great pronunciation!"
+        elif score < 65:
+            prefix = feedback
+
+        return {
+            "score": score,
+            "feedback": feedback,
+            "problematic_phonemes": problematic_phonemes,
+            "speaking_rate_wpm": metrics["speaking_rate_wpm"],
+            "pause_ratio": metrics["pause_ratio"],
+            "phoneme_scores": metrics["phoneme_scores"],
+            "prefix": prefix
+        }
+
+    async def _gemini(self, ctx: Dict) -> Dict:
+        return await gemini_service.analyze_language(
+            ctx["stt"]["transcript"],
+            user_level=ctx["user_level"],
+            personality=ctx["personality"]
+        )
+
+    async def _synthesize(self, text: Optional[str], voice_id: Optional[str]) -> Optional[bytes]:
+        if not text:
+            return None
+        try:
+            # Use provided voice_id or default logic handles it if None is passed
+            generate_args = {}
+            if voice_id:
+                generate_args["voice_id"] = voice_id
+            # Sentences render concurrently and repeated ones come from the audio cache
+            audio_parts = [part async for part in elevenlabs_service.generate_audio_sentences(text, **generate_args)]
+            return b"".join(audio_parts) or None
+        except Exception as e:
+            print(f"TTS Generation failed: {e}")
+            return None
+
+    @staticmethod
+    def _reply_text(analysis: Dict) -> str:
+        return " ".join(filter(None, [
+            analysis.get("learning_tip", ""),
+            analysis.get("follow_up_question", "")
+        ]))
+
+    async def _prefix_audio(self, ctx: Dict) -> Optional[bytes]:
+        if ctx["stream_audio"]:
+            return None
+        return await self._synthesize(ctx["pronunciation"]["prefix"], ctx["voice_id"])
+
+    async def _reply_audio(self, ctx: Dict) -> Optional[bytes]:
+        if ctx["stream_audio"]:
+            return None
+        return await self._synthesize(self._reply_text(ctx["gemini"]), ctx["voice_id"])
+
+    async def _response(self, ctx: Dict) -> Dict:
+        pronunciation = ctx["pronunciation"]
+        audio_base64 = None
+        audio_url = None
+
+        if ctx["stream_audio"]:
+            stream_id = elevenlabs_service.prepare_stream(
+                [pronunciation["prefix"], self._reply_text(ctx["gemini"])],
+                voice_id=ctx["voice_id"]
+            )
+            audio_url = f"/api/v1/conversation/audio/{stream_id}"
+        else:
+            # MP3 frames are self-delimiting, so the two clips can simply be concatenated
+            audio_parts = [part for part in (ctx["prefix_audio"], ctx["reply_audio"]) if part]
+            if audio_parts:
+                audio_base64 = base64.b64encode(b"".join(audio_parts)).decode('utf-8')
+
+        return {
+            "transcript": ctx["stt"]["transcript"],
+            "analysis": ctx["gemini"],
+            "pronunciation": {
+                "score": pronunciation["score"],
+                "feedback": pronunciation["feedback"],
+                "problematic_phonemes": pronunciation["problematic_phonemes"],
+                "speaking_rate_wpm": pronunciation["speaking_rate_wpm"],
+                "pause_ratio": pronunciation["pause_ratio"],
+                "phoneme_scores": pronunciation["phoneme_scores"],
+            },
+            "audio_base64": audio_base64,
+            "audio_url": audio_url,
+        }
+
+
+conversation_pipeline = ConversationPipeline()
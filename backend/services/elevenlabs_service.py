@@ -1,85 +1,232 @@
+import asyncio
+import re
+import secrets
+from typing import AsyncIterator, Dict, List, Optional
 from elevenlabs.client import ElevenLabs
+from core.cache import TTLCache
 from core.config import settings
+from core.executors import run_blocking, provider_executors
+from services.audio_cache import TTSAudioCache
+
+DEFAULT_VOICE_ID = "21m00Tcm4TlvDq8ikWAM"
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_CLAUSE_END = re.compile(r"(?<=[,;:])\s+")
+
 
 class ElevenLabsService:
     def __init__(self):
         self.client = ElevenLabs(api_key=settings.ELEVENLABS_API_KEY)
+        self.model_id = "eleven_multilingual_v2"
+        self.output_format = "mp3_44100_128"
+        self.audio_cache = TTSAudioCache(
+            memory_max_bytes=settings.TTS_CACHE_MEMORY_MB * 1024 * 1024,
+            disk_dir=settings.TTS_CACHE_DIR,
+            disk_max_bytes=settings.TTS_CACHE_DISK_MB * 1024 * 1024
+        )
+        # Texts waiting to be streamed, by the stream id handed to the client
+        self._pending_streams = TTLCache(maxsize=4096, ttl=settings.TTS_STREAM_TTL_SECONDS)
 
-    async def generate_audio(self, text: str, voice_id: str = "21m00Tcm4TlvDq8ikWAM") -> bytes:
+    async def generate_audio(self, text: str, voice_id: str = DEFAULT_VOICE_ID) -> bytes:
         """
         Generates audio from text using ElevenLabs.
         Returns audio bytes (MP3).
+        Repeated phrases are served from the audio cache without calling ElevenLabs.
         """
+        cache_key = TTSAudioCache.make_key(text, voice_id, self.model_id, self.output_format)
+        cached = await self.audio_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
-            # Using text_to_speech.convert which returns a generator
-            audio_generator = self.client.text_to_speech.convert(
-                text=text,
-                voice_id=voice_id,
-                model_id="eleven_multilingual_v2"
-            )
-            
-            # Combine the chunks into a single bytes object
-            audio_bytes = b"".join(chunk for chunk in audio_generator)
+            audio_bytes = await run_blocking("tts", self._synthesize, text, voice_id)
+            await self.audio_cache.put(cache_key, audio_bytes)
             return audio_bytes
         except Exception as e:
             print(f"Error generating audio with ElevenLabs: {e}")
             raise e
 
-    def get_voices(self):
+    @staticmethod
+    def split_sentences(text: str, min_chars: int = 12, max_chars: int = 200) -> List[str]:
         """
-        Fetches available voices from ElevenLabs.
+        Splits a reply into sentences for piecewise synthesis.
+        Very short fragments are merged into the previous sentence (each call has a
+        fixed overhead) and overly long sentences are split further at clause boundaries.
         """
+        pieces = []
+        for sentence in _SENTENCE_END.split(text.strip()):
+            if len(sentence) > max_chars:
+                pieces.extend(_CLAUSE_END.split(sentence))
+            elif sentence:
+                pieces.append(sentence)
+
+        merged = []
+        for piece in pieces:
+            if merged and len(piece) < min_chars:
+                merged[-1] = f"{merged[-1]} {piece}"
+            else:
+                merged.append(piece)
+        return merged
+
+    def _render_sentences(self, sentences: List[str], voice_id: str) -> List[asyncio.Task]:
+        """Starts synthesizing every sentence now, at most TTS_SENTENCE_CONCURRENCY at a time"""
+        semaphore = asyncio.Semaphore(settings.TTS_SENTENCE_CONCURRENCY)
+
+        async def render(sentence: str) -> Optional[bytes]:
+            async with semaphore:
+                try:
+                    return await self.generate_audio(sentence, voice_id)
+                except Exception:
+                    return None
+
+        return [asyncio.create_task(render(sentence)) for sentence in sentences]
+
+    async def generate_audio_sentences(self, text: str, voice_id: str = DEFAULT_VOICE_ID) -> AsyncIterator[bytes]:
+        """
+        Synthesizes the text sentence by sentence with bounded parallelism and
+        yields each sentence's MP3 in order, as soon as it and its predecessors are ready.
+        Sentences that fail to synthesize are skipped.
+        """
+        tasks = self._render_sentences(self.split_sentences(text), voice_id)
         try:
-            # User provided specific voices
-            target_voices = {
-                "jqcCZkN6Knx8BJ5TBdYR": {"name": "Zara", "category": "American Female", "description": "Professional"},
-                "yj30vwTGJxSHezdAGsv9": {"name": "Jessa", "category": "American Female", "description": "Friendly"},
-                "j9jfwdrw7BRfcR43Qohk": {"name": "Frederick Surrey", "category": "British Male", "description": "Formal"},
-                "kPzsL2i3teMYv0FxEYQ6": {"name": "Britteny", "category": "American Female", "description": "Energetic"},
-                "a1TnjruAs5jTzdrjL8Vd": {"name": "Frank", "category": "American Male", "description": "Deep"},
-                "qyFhaJEAwHR0eYLCmlUT": {"name": "Matt", "category": "American Male", "description": "Casual"}
-            }
-
-            try:
-                response = self.client.voices.get_all()
-                print(f"DEBUG: Found {len(response.voices)} voices in ElevenLabs account.")
-                
-                # 1. Try to find the target voices in the API response
-                for voice in response.voices:
-                    if voice.voice_id in target_voices:
-                        print(f"DEBUG: Found target voice {voice.name} ({voice.voice_id})")
-                        target_info = target_voices[voice.voice_id]
-                        voices.append({
-                            "voice_id": voice.voice_id,
-                            "name": target_info["name"],
-                            "category": voice.category or target_info["category"],
-                            "description": voice.description or target_info["description"],
-                            "preview_url": voice.preview_url
-                        })
-            except Exception as api_error:
-                print(f"Error fetching voices from ElevenLabs API (using fallback): {api_error}")
-
-            # 2. Always run fallback: If any are missing (or API failed), add them manually
-            found_ids = [v["voice_id"] for v in voices]
-            for vid, info in target_voices.items():
-                if vid not in found_ids:
-                    print(f"DEBUG: Target voice {info['name']} not in current list. Adding manually.")
-                    voices.append({
-                        "voice_id": vid,
-                        "name": info["name"],
-                        "category": info["category"],
-                        "description": info["description"],
-                        "preview_url": "" 
-                    })
-
-            print(f"DEBUG: Returning {len(voices)} voices.")
-            return voices
+            for task in tasks:
+                audio_bytes = await task
+                if audio_bytes:
+                    yield audio_bytes
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _synthesize(self, text: str, voice_id: str) -> bytes:
+        # text_to_speech.convert returns a lazy generator - the HTTP request happens
+        # while it is consumed, so the whole join has to run on the worker thread
+        audio_generator = self.client.text_to_speech.convert(
+            text=text,
+            voice_id=voice_id,
+            model_id=self.model_id,
+            output_format=self.output_format
+        )
+        return b"".join(chunk for chunk in audio_generator)
+
+    def prepare_stream(self, segments: List[Optional[str]], voice_id: Optional[str] = None) -> str:
+        """
+        Registers texts to be synthesized when the client fetches the stream.
+        Returns the stream id to build the audio URL from.
+        """
+        stream_id = secrets.token_urlsafe(16)
+        self._pending_streams.set(stream_id, {
+            "segments": [segment for segment in segments if segment],
+            "voice_id": voice_id or DEFAULT_VOICE_ID
+        })
+        return stream_id
+
+    def has_stream(self, stream_id: str) -> bool:
+        return stream_id in self._pending_streams
+
+    async def stream_audio(self, stream_id: str) -> AsyncIterator[bytes]:
+        """
+        Yields MP3 for a prepared stream as it is produced, so playback can
+        start before synthesis of the whole reply has finished.
+        """
+        job = self._pending_streams.get(stream_id)
+        if job is None:
+            return
+        sentences = [sentence for text in job["segments"] for sentence in self.split_sentences(text)]
+        if not sentences:
+            return
+
+        # The first sentence is streamed chunk by chunk while the rest render in the background
+        rest = self._render_sentences(sentences[1:], job["voice_id"])
+        try:
+            async for chunk in self._stream_segment(sentences[0], job["voice_id"]):
+                yield chunk
+            for task in rest:
+                audio_bytes = await task
+                if audio_bytes:
+                    yield audio_bytes
+        finally:
+            for task in rest:
+                task.cancel()
+
+    async def _stream_segment(self, text: str, voice_id: str) -> AsyncIterator[bytes]:
+        cache_key = TTSAudioCache.make_key(text, voice_id, self.model_id, self.output_format)
+        cached = await self.audio_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks = []
+        try:
+            async for chunk in provider_executors.iterate("tts", lambda: self.client.text_to_speech.convert_as_stream(
+                voice_id=voice_id,
+                text=text,
+                model_id=self.model_id,
+                output_format=self.output_format
+            )):
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            print(f"Error streaming audio with ElevenLabs: {e}")
+            return
+        await self.audio_cache.put(cache_key, b"".join(chunks))
+
+    # Voices offered in the app, with display info used when the API omits it
+    TARGET_VOICES = {
+        "jqcCZkN6Knx8BJ5TBdYR": {"name": "Zara", "category": "American Female", "description": "Professional"},
+        "yj30vwTGJxSHezdAGsv9": {"name": "Jessa", "category": "American Female", "description": "Friendly"},
+        "j9jfwdrw7BRfcR43Qohk": {"name": "Frederick Surrey", "category": "British Male", "description": "Formal"},
+        "kPzsL2i3teMYv0FxEYQ6": {"name": "Britteny", "category": "American Female", "description": "Energetic"},
+        "a1TnjruAs5jTzdrjL8Vd": {"name": "Frank", "category": "American Male", "description": "Deep"},
+        "qyFhaJEAwHR0eYLCmlUT": {"name": "Matt", "category": "American Male", "description": "Casual"}
+    }
+
+    def fetch_voices(self) -> List[Dict]:
+        """
+        Fetches the target voices from the ElevenLabs account (blocking).
+        Voices missing from the account are filled in from TARGET_VOICES.
+        Raises if the API call fails.
+        """
+        response = self.client.voices.get_all()
+
+        voices = []
+        for voice in response.voices:
+            if voice.voice_id in self.TARGET_VOICES:
+                target_info = self.TARGET_VOICES[voice.voice_id]
+                voices.append({
+                    "voice_id": voice.voice_id,
+                    "name": target_info["name"],
+                    "category": voice.category or target_info["category"],
+                    "description": voice.description or target_info["description"],
+                    "preview_url": voice.preview_url
+                })
+
+        found_ids = {v["voice_id"] for v in voices}
+        for vid, info in self.TARGET_VOICES.items():
+            if vid not in found_ids:
+                voices.append(self._fallback_voice(vid, info))
+        return voices
+
+    def get_voices(self) -> List[Dict]:
+        """
+        Fetches available voices from ElevenLabs, falling back to the hardcoded list.
+        """
+        try:
+            return self.fetch_voices()
         except Exception as e:
-            print(f"Critical error in get_voices: {e}")
-            # Even in critical error, try to return the hardcoded list
-            return [
-                {"voice_id": vid, "name": info["name"], "category": info["category"], "description": info["description"], "preview_url": ""}
-                for vid, info in target_voices.items()
-            ]
+            print(f"Error fetching voices from ElevenLabs API (using fallback): {e}")
+            return self.fallback_voices()
+
+    def fallback_voices(self) -> List[Dict]:
+        return [self._fallback_voice(vid, info) for vid, info in self.TARGET_VOICES.items()]
+
+    @staticmethod
+    def _fallback_voice(voice_id: str, info: Dict) -> Dict:
+        return {
+            "voice_id": voice_id,
+            "name": info["name"],
+            "category": info["category"],
+            "description": info["description"],
+            "preview_url": ""
+        }
 
 elevenlabs_service = ElevenLabsService()
@@ -1,6 +1,7 @@
+import asyncio
 from datetime import datetime
-from typing import Dict, List, Optional
-from database.models import AchievementModel, StreakModel
+from typing import Dict, List, Optional, Set
+from database.models import AchievementModel, ProgressSummaryView, StreakModel, UserStatsView
 from database.repositories import (
     AchievementRepository, StreakRepository, 
     UserRepository, ProgressRepository
@@ -64,6 +65,19 @@ class GamificationService:
         }
     }
     
+    # When each achievement is earned: metric >= min and/or metric <= max.
+    # Milestones use >= so an exact count skipped between checks still earns the award.
+    ACHIEVEMENT_RULES = {
+        "first_conversation": {"metric": "total_conversations", "min": 1},
+        "ten_conversations": {"metric": "total_conversations", "min": 10},
+        "fifty_conversations": {"metric": "total_conversations", "min": 50},
+        "hundred_conversations": {"metric": "total_conversations", "min": 100},
+        "pronunciation_master": {"metric": "pronunciation_score", "min": 90, "record": True},
+        "error_free": {"metric": "error_count", "max": 0},
+        "week_streak": {"metric": "current_streak", "min": 7},
+        "month_streak": {"metric": "current_streak", "min": 30}
+    }
+    
     async def calculate_conversation_points(
         self,
         pronunciation_score: float,
@@ -106,104 +120,65 @@ class GamificationService:
         Returns:
             List of newly awarded achievements
         """
-        new_achievements = []
-        
-        # Get user progress
-        progress = await ProgressRepository.get_or_create_progress(user_id)
-        user = await UserRepository.get_user_by_firebase_uid(user_id)
+        progress, user, earned = await asyncio.gather(
+            ProgressRepository.get_or_create_progress(user_id, ProgressSummaryView),
+            UserRepository.get_user_by_firebase_uid(user_id, UserStatsView),
+            AchievementRepository.get_earned_types(user_id)
+        )
         
         if not user:
-            return new_achievements
-        
-        # Check first conversation
-        if progress.total_conversations == 1:
-            achievement = AchievementModel(
-                user_id=user_id,
-                achievement_type="first_conversation",
-                **self.ACHIEVEMENTS["first_conversation"]
-            )
-            await AchievementRepository.award_achievement(achievement)
-            await UserRepository.increment_points(user_id, self.ACHIEVEMENTS["first_conversation"]["points"])
-            new_achievements.append(achievement)
-        
-        # Check conversation milestones
-        if progress.total_conversations == 10:
-            achievement = AchievementModel(
-                user_id=user_id,
-                achievement_type="ten_conversations",
-                **self.ACHIEVEMENTS["ten_conversations"]
-            )
-            await AchievementRepository.award_achievement(achievement)
-            await UserRepository.increment_points(user_id, self.ACHIEVEMENTS["ten_conversations"]["points"])
-            new_achievements.append(achievement)
+            return []
         
-        elif progress.total_conversations == 50:
-            achievement = AchievementModel(
-                user_id=user_id,
-                achievement_type="fifty_conversations",
-                **self.ACHIEVEMENTS["fifty_conversations"]
-            )
-            await AchievementRepository.award_achievement(achievement)
-            await UserRepository.increment_points(user_id, self.ACHIEVEMENTS["fifty_conversations"]["points"])
-            new_achievements.append(achievement)
-        
-        elif progress.total_conversations == 100:
-            achievement = AchievementModel(
-                user_id=user_id,
-                achievement_type="hundred_conversations",
-                **self.ACHIEVEMENTS["hundred_conversations"]
-            )
-            await AchievementRepository.award_achievement(achievement)
-            await UserRepository.increment_points(user_id, self.ACHIEVEMENTS["hundred_conversations"]["points"])
-            new_achievements.append(achievement)
-        
-        # Check pronunciation master
-        pronunciation_score = conversation_data.get("pronunciation_score", 0)
-        if pronunciation_score >= 90:
-            achievement = AchievementModel(
-                user_id=user_id,
-                achievement_type="pronunciation_master",
-                **self.ACHIEVEMENTS["pronunciation_master"],
-                metadata={"score": pronunciation_score}
-            )
-            await AchievementRepository.award_achievement(achievement)
-            await UserRepository.increment_points(user_id, self.ACHIEVEMENTS["pronunciation_master"]["points"])
-            new_achievements.append(achievement)
-        
-        # Check error-free conversation
-        if conversation_data.get("error_count", 0) == 0:
-            achievement = AchievementModel(
-                user_id=user_id,
-                achievement_type="error_free",
-                **self.ACHIEVEMENTS["error_free"]
-            )
-            await AchievementRepository.award_achievement(achievement)
-            await UserRepository.increment_points(user_id, self.ACHIEVEMENTS["error_free"]["points"])
-            new_achievements.append(achievement)
-        
-        # Check streak achievements
-        if user.current_streak == 7:
-            achievement = AchievementModel(
-                user_id=user_id,
-                achievement_type="week_streak",
-                **self.ACHIEVEMENTS["week_streak"]
-            )
-            await AchievementRepository.award_achievement(achievement)
-            await UserRepository.increment_points(user_id, self.ACHIEVEMENTS["week_streak"]["points"])
-            new_achievements.append(achievement)
+        metrics = {
+            "total_conversations": progress.total_conversations,
+            "current_streak": user.current_streak,
+            "pronunciation_score": conversation_data.get("pronunciation_score", 0),
+            "error_count": conversation_data.get("error_count", 0)
+        }
+        candidates = self.evaluate_achievements(user_id, metrics, earned)
+        if not candidates:
+            return []
         
-        elif user.current_streak == 30:
-            achievement = AchievementModel(
-                user_id=user_id,
-                achievement_type="month_streak",
-                **self.ACHIEVEMENTS["month_streak"]
-            )
-            await AchievementRepository.award_achievement(achievement)
-            await UserRepository.increment_points(user_id, self.ACHIEVEMENTS["month_streak"]["points"])
-            new_achievements.append(achievement)
+        # The unique (user_id, achievement_type) index drops anything awarded concurrently,
+        # so points are only added for achievements that were actually inserted
+        new_achievements = await AchievementRepository.award_achievements(candidates)
+        points = sum(self.ACHIEVEMENTS[a.achievement_type]["points"] for a in new_achievements)
+        if points:
+            await UserRepository.increment_points(user_id, points)
         
         return new_achievements
     
+    def evaluate_achievements(
+        self,
+        user_id: str,
+        metrics: Dict,
+        earned: Set[str]
+    ) -> List[AchievementModel]:
+        """
+        Evaluates ACHIEVEMENT_RULES against the metrics in memory
+        Args:
+            metrics: total_conversations, current_streak, pronunciation_score, error_count
+            earned: achievement types the user already has
+        Returns:
+            Achievements the user qualifies for and hasn't earned yet
+        """
+        achievements = []
+        for achievement_type, rule in self.ACHIEVEMENT_RULES.items():
+            if achievement_type in earned:
+                continue
+            value = metrics[rule["metric"]]
+            if "min" in rule and value < rule["min"]:
+                continue
+            if "max" in rule and value > rule["max"]:
+                continue
+            achievements.append(AchievementModel(
+                user_id=user_id,
+                achievement_type=achievement_type,
+                **self.ACHIEVEMENTS[achievement_type],
+                metadata={rule["metric"]: value} if rule.get("record") else None
+            ))
+        return achievements
+    
     async def update_user_streak(self, user_id: str) -> Dict:
         """
         Update user's practice streak
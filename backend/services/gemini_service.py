@@ -1,12 +1,32 @@
 import google.generativeai as genai
+import copy
 import json
+import re
+from typing import Optional
+from core.cache import TTLCache, SingleFlight
 from core.config import settings
+from core.executors import run_blocking
 
 class GeminiService:
     def __init__(self):
         api_key = settings.GOOGLE_API_KEY
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel('gemini-2.5-flash')
+        # Model output keyed by (transcript with whitespace collapsed, level, personality)
+        self.analysis_cache = TTLCache(
+            maxsize=settings.GEMINI_CACHE_SIZE,
+            ttl=settings.GEMINI_CACHE_TTL_SECONDS
+        )
+        self._in_flight = SingleFlight()
+
+    @staticmethod
+    def _normalize_transcript(text: str) -> str:
+        """
+        Collapse runs of whitespace only: case and punctuation are what the grammar
+        and punctuation corrections are about, so "i went home" and "I went home?"
+        must not share an analysis
+        """
+        return re.sub(r"\s+", " ", text).strip()
 
     async def analyze_language(
         self, 
@@ -81,9 +101,45 @@ class GeminiService:
         REMEMBER: Keep responses concise but natural. The goal is engaging conversation practice.
         """
         
+        # Turns without history only depend on (transcript, level, personality),
+        # so identical ones share a cached result and concurrent ones share one call
+        cache_key = None
+        model_analysis = None
+        if not conversation_history:
+            cache_key = (self._normalize_transcript(user_text), user_level, personality)
+            model_analysis = self.analysis_cache.get(cache_key)
+
+        if model_analysis is None:
+            if cache_key is not None:
+                model_analysis = await self._in_flight.do(
+                    cache_key,
+                    lambda: self._generate_analysis(prompt, cache_key)
+                )
+            else:
+                model_analysis = await self._generate_analysis(prompt)
+
+        if model_analysis is None:
+            return self._get_fallback_response(user_text, user_level, personality)
+
+        # Local enrichments are cheap and applied to every request, cached or not
+        analysis = copy.deepcopy(model_analysis)
+        analysis['feedback_tone'] = personality
+        analysis['user_level'] = user_level
+        analysis['detected_emotion'] = self._detect_emotion(user_text)
+        analysis['emotional_feedback'] = self._get_emotional_feedback(analysis['detected_emotion'])
+        analysis['cultural_context'] = self._add_cultural_context(user_text)
+        
+        return analysis
+
+    async def _generate_analysis(self, prompt: str, cache_key: tuple = None) -> Optional[dict]:
+        """
+        Calls Gemini and parses its JSON answer.
+        Returns None when the call or parsing fails (callers use the fallback).
+        """
+        text_response = ""
         try:
             # Generate response from Gemini
-            response = self.model.generate_content(prompt)
+            response = await run_blocking("gemini", self.model.generate_content, prompt)
             text_response = response.text.strip()
             
             # Clean JSON response (remove markdown code blocks if present)
@@ -94,23 +150,20 @@ class GeminiService:
             
             # Parse the JSON response
             analysis = json.loads(text_response)
+            if not isinstance(analysis, dict):
+                print(f"Unexpected Gemini response shape: {text_response}")
+                return None
             
-            # Add additional metadata for your app
-            analysis['feedback_tone'] = personality
-            analysis['user_level'] = user_level
-            analysis['detected_emotion'] = self._detect_emotion(user_text)
-            analysis['emotional_feedback'] = self._get_emotional_feedback(analysis['detected_emotion'])
-            analysis['cultural_context'] = self._add_cultural_context(user_text)
-            
+            if cache_key is not None:
+                self.analysis_cache.set(cache_key, analysis)
             return analysis
             
         except json.JSONDecodeError as e:
             print(f"JSON parsing error: {e}. Response was: {text_response}")
-            # Fallback with intelligent context
-            return self._get_fallback_response(user_text, user_level, personality)
+            return None
         except Exception as e:
             print(f"Gemini analysis error: {e}")
-            return self._get_fallback_response(user_text, user_level, personality)
+            return None
     
     def _detect_emotion(self, text: str) -> str:
         """Simple emotion detection based on keywords"""
@@ -0,0 +1,196 @@
+import mmap
+import os
+import re
+import struct
+import zlib
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from core.config import settings
+
+# ARPAbet phones (stress markers stripped); bit i of a phone mask = ARPABET[i]
+ARPABET = (
+    "AA", "AE", "AH", "AO", "AW", "AY", "B", "CH", "D", "DH", "EH", "ER", "EY",
+    "F", "G", "HH", "IH", "IY", "JH", "K", "L", "M", "N", "NG", "OW", "OY", "P",
+    "R", "S", "SH", "T", "TH", "UH", "UW", "V", "W", "Y", "Z", "ZH"
+)
+PHONE_BITS = {phone: 1 << i for i, phone in enumerate(ARPABET)}
+
+# Sounds tracked for learners (the keys of PronunciationService.PHONEME_PATTERNS) -> ARPAbet phones
+LEARNER_PHONEMES = {
+    "th": ("TH", "DH"),
+    "r": ("R", "ER"),
+    "l": ("L",),
+    "v": ("V",),
+    "w": ("W",),
+    "ch": ("CH",),
+    "sh": ("SH",),
+}
+_LEARNER_MASKS = [
+    (label, sum(PHONE_BITS[phone] for phone in phones)) for label, phones in LEARNER_PHONEMES.items()
+]
+
+# Spelling fallback for words missing from the lexicon: one compiled alternation,
+# longest graphemes first so "tch" wins over "ch" and "wh" over "w"
+_GRAPHEMES = [
+    ("tch", "ch"), ("tion", "sh"), ("sion", "sh"), ("th", "th"), ("sh", "sh"), ("ch", "ch"),
+    ("wh", "w"), ("wr", "r"), ("w(?=[aeiouy])", "w"), ("r", "r"), ("l", "l"), ("v", "v"),
+]
+_GRAPHEME_PATTERN = re.compile("|".join(f"({pattern})" for pattern, _ in _GRAPHEMES))
+_GRAPHEME_LABELS = [label for _, label in _GRAPHEMES]
+
+_WORD_CLEANUP = re.compile(r"[^a-z']")
+
+# Lexicon file: header, open-addressing slot table, then the words (to confirm hash hits)
+_MAGIC = b"PLEX"
+_VERSION = 1
+_HEADER = struct.Struct("<4sIII")  # magic, version, slot count (power of two), entry count
+_SLOT = struct.Struct("<IIHxxQ")  # word hash, word offset, word length (0 = empty), phone mask
+
+
+def word_hash(data: bytes) -> int:
+    # CRC-32 runs in C and is stable across processes (unlike hash()); hits are
+    # confirmed against the stored word, so 32 bits are plenty
+    return zlib.crc32(data)
+
+
+def normalize_word(word: str) -> str:
+    return _WORD_CLEANUP.sub("", word.lower()).strip("'")
+
+
+def phone_mask(phones: Iterable[str]) -> int:
+    mask = 0
+    for phone in phones:
+        mask |= PHONE_BITS.get(phone.rstrip("012"), 0)
+    return mask
+
+
+def mask_phones(mask: int) -> List[str]:
+    return [phone for phone, bit in PHONE_BITS.items() if mask & bit]
+
+
+class PronunciationLexicon:
+    """
+    Read-only word -> phone set lookup over a memory-mapped lexicon file.
+    Lookups are O(1) (hash + short linear probe); the file is shared through the
+    page cache, so opening it costs nothing per worker.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.slot_count, self.entry_count = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a version {_VERSION} pronunciation lexicon")
+        self._slots_offset = _HEADER.size
+        self._probe_mask = self.slot_count - 1
+
+    def __len__(self) -> int:
+        return self.entry_count
+
+    def lookup(self, word: str) -> Optional[int]:
+        """Phone mask of a normalized word, or None if the word isn't in the lexicon"""
+        data = word.encode()
+        hashed = word_hash(data)
+        slot = hashed & self._probe_mask
+        while True:
+            entry_hash, offset, length, mask = _SLOT.unpack_from(self._map, self._slots_offset + slot * _SLOT.size)
+            if length == 0:
+                return None
+            if entry_hash == hashed and self._map[offset:offset + length] == data:
+                return mask
+            slot = (slot + 1) & self._probe_mask
+
+    def words(self) -> Iterator[str]:
+        for slot in range(self.slot_count):
+            _, offset, length, _ = _SLOT.unpack_from(self._map, self._slots_offset + slot * _SLOT.size)
+            if length:
+                yield self._map[offset:offset + length].decode()
+
+    def close(self):
+        self._map.close()
+
+
+def read_cmudict(lines: Iterable[str]) -> Dict[str, int]:
+    """
+    Parses CMUdict-style lines ("WORD  PH1 PH2 ...", ";;;" comments, "WORD(2)"
+    for alternate pronunciations, whose phones are merged into the word's mask)
+    """
+    masks: Dict[str, int] = {}
+    for line in lines:
+        if not line.strip() or line.startswith(";;;"):
+            continue
+        parts = line.split("#", 1)[0].split()
+        if len(parts) < 2:
+            continue
+        word = normalize_word(re.sub(r"\(\d+\)$", "", parts[0]))
+        if word:
+            masks[word] = masks.get(word, 0) | phone_mask(parts[1:])
+    return masks
+
+
+def build_lexicon(masks: Dict[str, int], path: str, load_factor: float = 0.5) -> int:
+    """Writes masks as a lexicon file; returns the number of entries"""
+    slot_count = 1
+    while slot_count * load_factor < max(len(masks), 1):
+        slot_count <<= 1
+
+    words_offset = _HEADER.size + slot_count * _SLOT.size
+    slots: List[Optional[Tuple[int, int, int, int]]] = [None] * slot_count
+    words = bytearray()
+    for word, mask in masks.items():
+        data = word.encode()
+        hashed = word_hash(data)
+        slot = hashed & (slot_count - 1)
+        while slots[slot] is not None:
+            slot = (slot + 1) & (slot_count - 1)
+        slots[slot] = (hashed, words_offset + len(words), len(data), mask)
+        words += data
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, slot_count, len(masks)))
+        empty = _SLOT.pack(0, 0, 0, 0)
+        f.write(b"".join(_SLOT.pack(*slot) if slot else empty for slot in slots))
+        f.write(words)
+    os.replace(tmp_path, path)
+    return len(masks)
+
+
+class PhoneticAnalyzer:
+    """
+    Maps words to the learner sounds they contain: the pronunciation lexicon
+    when the word is in it, otherwise a single-pass grapheme match on the spelling
+    """
+
+    def __init__(self, lexicon_path: str):
+        self.lexicon: Optional[PronunciationLexicon] = None
+        if lexicon_path and os.path.exists(lexicon_path):
+            try:
+                self.lexicon = PronunciationLexicon(lexicon_path)
+            except (OSError, ValueError) as e:
+                print(f"WARNING: could not open pronunciation lexicon {lexicon_path}: {e}")
+        else:
+            print(f"WARNING: no pronunciation lexicon at {lexicon_path} - using spelling rules only")
+        self._word_sounds = lru_cache(maxsize=settings.PHONETICS_CACHE_SIZE)(self._lookup_sounds)
+
+    def word_sounds(self, word: str) -> Tuple[str, ...]:
+        """Learner sounds (e.g. "th", "r") in a word"""
+        return self._word_sounds(normalize_word(word))
+
+    def _lookup_sounds(self, word: str) -> Tuple[str, ...]:
+        if not word:
+            return ()
+        mask = self.lexicon.lookup(word) if self.lexicon else None
+        if mask is not None:
+            return tuple(label for label, label_mask in _LEARNER_MASKS if mask & label_mask)
+        return self.spelling_sounds(word)
+
+    @staticmethod
+    def spelling_sounds(word: str) -> Tuple[str, ...]:
+        found = dict.fromkeys(_GRAPHEME_LABELS[match.lastindex - 1] for match in _GRAPHEME_PATTERN.finditer(word))
+        return tuple(found)
+
+
+phonetic_analyzer = PhoneticAnalyzer(settings.PRONUNCIATION_LEXICON_PATH)
@@ -1,5 +1,6 @@
-from typing import Dict, List, Optional, Tuple
-import statistics
+from typing import List, Tuple
+from services.phonetics import phonetic_analyzer
+from services.scoring_engine import scoring_engine
 
 
 class PronunciationService:
@@ -7,7 +8,7 @@ class PronunciationService:
     Service for analyzing pronunciation quality and tracking improvement
     """
     
-    # Common problematic phonemes for language learners
+    # Common problematic phonemes for language learners, with practice words
     PHONEME_PATTERNS = {
         "th": ["the", "that", "this", "think", "three", "mother", "father"],
         "r": ["red", "right", "very", "carry", "area"],
@@ -20,32 +21,21 @@ class PronunciationService:
     
     def calculate_pronunciation_score(
         self, 
-        word_confidences: List[Tuple[str, float]]
+        word_confidences: List[Tuple]
     ) -> float:
         """
         Calculate overall pronunciation score (0-100) based on word confidence scores
         Args:
-            word_confidences: List of (word, confidence) tuples from Speech-to-Text
+            word_confidences: List of (word, confidence) or (word, confidence, start, end)
+                tuples from Speech-to-Text; with timings, longer words weigh more
         Returns:
-            Score from 0-100
+            Score from 0-100 (50 when there are no words)
         """
-        if not word_confidences:
-            return 50.0  # Neutral score
-        
-        # Extract confidence values
-        confidences = [conf for _, conf in word_confidences]
-        
-        # Calculate weighted average (higher confidence = better pronunciation)
-        avg_confidence = statistics.mean(confidences)
-        
-        # Convert to 0-100 scale (Speech-to-Text confidence is typically 0.0-1.0)
-        score = avg_confidence * 100
-        
-        return round(score, 2)
+        return scoring_engine.score_turn(word_confidences)["score"]
     
     def identify_problematic_phonemes(
         self, 
-        word_confidences: List[Tuple[str, float]],
+        word_confidences: List[Tuple],
         threshold: float = 0.7
     ) -> List[str]:
         """
@@ -56,43 +46,16 @@ class PronunciationService:
         Returns:
             List of problematic phoneme identifiers
         """
-        problematic = set()
+        problematic = {}
         
-        for word, confidence in word_confidences:
+        for word, confidence, *_ in word_confidences:
             if confidence < threshold:
-                # Check which phonemes this word contains
-                word_lower = word.lower()
-                for phoneme, patterns in self.PHONEME_PATTERNS.items():
-                    if any(pattern in word_lower for pattern in patterns):
-                        problematic.add(phoneme)
+                # Sounds the word actually contains, from the pronunciation lexicon
+                for phoneme in phonetic_analyzer.word_sounds(word):
+                    problematic[phoneme] = True
         
         return list(problematic)
     
-    def calculate_improvement(
-        self, 
-        historical_scores: List[float],
-        recent_scores: List[float]
-    ) -> float:
-        """
-        Calculate improvement percentage between historical and recent scores
-        Args:
-            historical_scores: Old scores (e.g., from last week)
-            recent_scores: Recent scores (e.g., from this week)
-        Returns:
-            Improvement percentage (can be negative if scores declined)
-        """
-        if not historical_scores or not recent_scores:
-            return 0.0
-        
-        historical_avg = statistics.mean(historical_scores)
-        recent_avg = statistics.mean(recent_scores)
-        
-        if historical_avg == 0:
-            return 0.0
-        
-        improvement = ((recent_avg - historical_avg) / historical_avg) * 100
-        return round(improvement, 1)
-    
     def generate_pronunciation_feedback(
         self,
         score: float,
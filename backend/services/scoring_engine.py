@@ -0,0 +1,138 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from services.phonetics import LEARNER_PHONEMES, phonetic_analyzer
+
+NEUTRAL_SCORE = 50.0
+PHONEMES: Tuple[str, ...] = tuple(LEARNER_PHONEMES)
+_PHONEME_INDEX = {phoneme: i for i, phoneme in enumerate(PHONEMES)}
+
+
+class ScoringEngine:
+    """
+    Vectorized pronunciation scoring over batches of utterances.
+
+    A batch is flat per-word arrays (confidence, start and end in seconds) plus
+    offsets: utterance i is words offsets[i]:offsets[i + 1]. Live turns are a
+    batch of one; historical conversations can be re-scored thousands at a time.
+    """
+
+    def score_batch(
+        self,
+        confidences: Sequence[float],
+        starts: Sequence[float],
+        ends: Sequence[float],
+        offsets: Sequence[int],
+        words: Optional[Sequence[str]] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Scores every utterance of a batch in one pass
+        Returns arrays with one row per utterance:
+            score: 0-100, confidence weighted by word duration (plain mean when there are no timings)
+            speaking_rate_wpm: words per minute between the first word's start and the last word's end
+            pause_ratio: share of that span with no word being spoken
+            word_count
+            phoneme_scores (utterances x PHONEMES): duration-weighted score of the words containing
+                each sound, NaN where no word did (needs words)
+            phoneme_words (utterances x PHONEMES): number of words containing each sound
+        """
+        confidences = np.asarray(confidences, dtype=np.float64)
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.asarray(ends, dtype=np.float64)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        count = len(offsets) - 1
+        lengths = np.diff(offsets)
+        utterance = np.repeat(np.arange(count), lengths)
+
+        durations = np.clip(ends - starts, 0.0, None)
+        spoken = np.bincount(utterance, weights=durations, minlength=count)
+        # Utterances without timings weigh every word the same
+        weights = np.where(spoken[utterance] > 0, durations, 1.0)
+        weight_sums = np.bincount(utterance, weights=weights, minlength=count)
+        weighted = np.bincount(utterance, weights=confidences * weights, minlength=count)
+
+        has_words = lengths > 0
+        score = np.full(count, NEUTRAL_SCORE)
+        score[has_words] = weighted[has_words] / weight_sums[has_words] * 100
+
+        span = np.zeros(count)
+        if has_words.any():
+            first = offsets[:-1][has_words]
+            span[has_words] = np.maximum.reduceat(ends, first) - np.minimum.reduceat(starts, first)
+        has_span = span > 0
+        safe_span = np.where(has_span, span, 1.0)
+        speaking_rate = np.where(has_span, lengths / safe_span * 60, 0.0)
+        pause_ratio = np.where(has_span, np.clip(1 - spoken / safe_span, 0.0, 1.0), 0.0)
+
+        phoneme_count = len(PHONEMES)
+        phoneme_scores = np.full((count, phoneme_count), np.nan)
+        phoneme_words = np.zeros((count, phoneme_count), dtype=np.int64)
+        if words is not None and len(words):
+            word_index, phoneme_index = self._word_phonemes(words)
+            if len(word_index):
+                keys = utterance[word_index] * phoneme_count + phoneme_index
+                size = count * phoneme_count
+                pair_weights = weights[word_index]
+                totals = np.bincount(keys, weights=pair_weights, minlength=size)
+                sums = np.bincount(keys, weights=confidences[word_index] * pair_weights, minlength=size)
+                phoneme_words = np.bincount(keys, minlength=size).reshape(count, phoneme_count)
+                present = totals > 0
+                flat_scores = phoneme_scores.reshape(-1)
+                flat_scores[present] = sums[present] / totals[present] * 100
+
+        return {
+            "score": score,
+            "speaking_rate_wpm": speaking_rate,
+            "pause_ratio": pause_ratio,
+            "word_count": lengths,
+            "phoneme_scores": phoneme_scores,
+            "phoneme_words": phoneme_words,
+        }
+
+    def score_turns(self, turns: Sequence[Sequence[Tuple]]) -> Dict[str, np.ndarray]:
+        """
+        Scores many turns at once, e.g. to re-score history in bulk
+        Args:
+            turns: per turn, (word, confidence) or (word, confidence, start, end) tuples
+        """
+        flat = [word for turn in turns for word in turn]
+        offsets = np.zeros(len(turns) + 1, dtype=np.int64)
+        np.cumsum([len(turn) for turn in turns], out=offsets[1:])
+        return self.score_batch(
+            [word[1] for word in flat],
+            [word[2] if len(word) > 2 else 0.0 for word in flat],
+            [word[3] if len(word) > 3 else 0.0 for word in flat],
+            offsets,
+            [word[0] for word in flat]
+        )
+
+    def score_turn(self, word_timings: Sequence[Tuple]) -> Dict:
+        """
+        Scores one turn
+        Returns: score, speaking_rate_wpm, pause_ratio and phoneme_scores ({sound: score}
+        for the sounds present in the turn)
+        """
+        batch = self.score_turns([word_timings])
+        return {
+            "score": round(float(batch["score"][0]), 2),
+            "speaking_rate_wpm": round(float(batch["speaking_rate_wpm"][0]), 1),
+            "pause_ratio": round(float(batch["pause_ratio"][0]), 3),
+            "phoneme_scores": {
+                phoneme: round(float(score), 2)
+                for phoneme, score, words in zip(PHONEMES, batch["phoneme_scores"][0], batch["phoneme_words"][0])
+                if words
+            }
+        }
+
+    @staticmethod
+    def _word_phonemes(words: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        # (word, sound) pairs; lookups come from the phonetic analyzer's word cache
+        word_index: List[int] = []
+        phoneme_index: List[int] = []
+        for i, word in enumerate(words):
+            for phoneme in phonetic_analyzer.word_sounds(word):
+                word_index.append(i)
+                phoneme_index.append(_PHONEME_INDEX[phoneme])
+        return np.asarray(word_index, dtype=np.int64), np.asarray(phoneme_index, dtype=np.int64)
+
+
+scoring_engine = ScoringEngine()
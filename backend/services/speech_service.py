@@ -1,51 +1,183 @@
+import asyncio
+import hashlib
+import queue
 from google.cloud import speech
-from typing import Dict
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from core.cache import TTLCache, SingleFlight
 from core.config import settings
+from core.executors import run_blocking, provider_executors
 
 class SpeechService:
     def __init__(self):
         self.client = speech.SpeechClient()
+        # Results keyed by (audio digest, encoding, sample rate): a retried upload
+        # gets its transcript back without another recognition
+        self.transcription_cache = TTLCache(
+            maxsize=settings.STT_CACHE_SIZE,
+            ttl=settings.STT_CACHE_TTL_SECONDS
+        )
+        self._in_flight = SingleFlight()
 
-    async def transcribe_audio(self, audio_content: bytes) -> Dict:
-        """
-        Transcribes audio content to text using Google Speech-to-Text.
-        Returns both transcript and word-level confidence scores for pronunciation analysis.
-        """
-        audio = speech.RecognitionAudio(content=audio_content)
-        
+    def _recognition_config(self, encoding: str = "WEBM_OPUS", sample_rate: Optional[int] = 48000) -> speech.RecognitionConfig:
         # Configure for best results with language learning
-        config = speech.RecognitionConfig(
-            encoding=speech.RecognitionConfig.AudioEncoding.WEBM_OPUS,
-            sample_rate_hertz=48000,
+        # (a sample rate of 0 lets STT read it from the WAV / FLAC header)
+        return speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding[encoding],
+            sample_rate_hertz=sample_rate or 0,
             language_code="en-US",
             enable_automatic_punctuation=True,
             enable_word_confidence=True,  # Enable word-level confidence scores
             enable_word_time_offsets=True,  # Useful for detailed analysis
         )
 
+    async def transcribe_audio(
+        self,
+        audio_content: bytes,
+        encoding: Optional[str] = None,
+        sample_rate: Optional[int] = None,
+        audio_digest: Optional[str] = None
+    ) -> Dict:
+        """
+        Transcribes audio content to text using Google Speech-to-Text.
+        Returns both transcript and word-level confidence scores for pronunciation analysis,
+        plus word_timings: (word, confidence, start_seconds, end_seconds) per word.
+        encoding / sample_rate describe the audio (see audio_preprocessing); WebM Opus at 48 kHz by default.
+        audio_digest is the SHA-256 hex digest of audio_content if the caller already has it.
+        """
+        if not encoding:
+            encoding, sample_rate = "WEBM_OPUS", 48000
+        cache_key = (audio_digest or hashlib.sha256(audio_content).hexdigest(), encoding, sample_rate)
+        result = self.transcription_cache.get(cache_key)
+        if result is None:
+            # Concurrent duplicates (a retry racing the original upload) share one recognition
+            result = await self._in_flight.do(
+                cache_key,
+                lambda: self._recognize(audio_content, encoding, sample_rate, cache_key)
+            )
+        # Callers get their own dict; the word lists are shared and treated as read-only
+        return dict(result)
+
+    async def _recognize(self, audio_content: bytes, encoding: str, sample_rate: Optional[int], cache_key: tuple) -> Dict:
+        audio = speech.RecognitionAudio(content=audio_content)
+        config = self._recognition_config(encoding, sample_rate)
+
         try:
-            response = self.client.recognize(config=config, audio=audio)
+            response = await run_blocking("stt", self.client.recognize, config=config, audio=audio)
             
             transcript = ""
             word_confidences = []
+            word_timings = []
             
             for result in response.results:
                 alternative = result.alternatives[0]
                 transcript += alternative.transcript
                 
-                # Extract word-level confidence scores
-                for word_info in alternative.words:
-                    word = word_info.word
-                    confidence = word_info.confidence
-                    word_confidences.append((word, confidence))
+                # Extract word-level confidence scores and timings
+                word_timings.extend(self._word_timings(alternative))
+            word_confidences = [(word, confidence) for word, confidence, _, _ in word_timings]
             
-            return {
+            recognized = {
                 "transcript": transcript,
                 "word_confidences": word_confidences,
+                "word_timings": word_timings,
                 "confidence": result.alternatives[0].confidence if response.results else 0.0
             }
+            self.transcription_cache.set(cache_key, recognized)
+            return recognized
         except Exception as e:
             print(f"Error extracting text from audio: {e}")
             raise e
 
+    async def stream_transcribe(self, audio_chunks: AsyncIterator[bytes]) -> AsyncIterator[Dict]:
+        """
+        Streams audio chunks to Google streaming_recognize while they are still arriving.
+        Yields interim and final results as they come back:
+            {"transcript", "is_final", "stability", "word_confidences", "word_timings"}
+        Word confidences and timings are only populated on final results.
+        """
+        loop = asyncio.get_running_loop()
+        streaming_config = speech.StreamingRecognitionConfig(
+            config=self._recognition_config(),
+            interim_results=True,
+        )
+        # The SDK consumes requests from a blocking iterator on the worker thread,
+        # so audio is handed over through a thread-safe queue (None ends the stream)
+        pending_audio: queue.Queue = queue.Queue()
+        results: asyncio.Queue = asyncio.Queue()
+        finished = object()
+
+        def request_iterator():
+            while True:
+                chunk = pending_audio.get()
+                if chunk is None:
+                    return
+                yield speech.StreamingRecognizeRequest(audio_content=chunk)
+
+        def consume_responses():
+            try:
+                responses = self.client.streaming_recognize(
+                    config=streaming_config,
+                    requests=request_iterator()
+                )
+                for response in responses:
+                    for result in response.results:
+                        loop.call_soon_threadsafe(results.put_nowait, self._parse_streaming_result(result))
+            except Exception as e:
+                loop.call_soon_threadsafe(results.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(results.put_nowait, finished)
+
+        async def pump_audio():
+            try:
+                async for chunk in audio_chunks:
+                    pending_audio.put(chunk)
+            finally:
+                pending_audio.put(None)
+
+        pump_task = asyncio.create_task(pump_audio())
+        loop.run_in_executor(provider_executors.get("stt_stream"), consume_responses)
+
+        try:
+            while True:
+                item = await results.get()
+                if item is finished:
+                    break
+                if isinstance(item, Exception):
+                    print(f"Error in streaming recognition: {item}")
+                    raise item
+                yield item
+        finally:
+            pump_task.cancel()
+            pending_audio.put(None)
+
+    def _parse_streaming_result(self, result) -> Dict:
+        if not result.alternatives:
+            return {
+                "transcript": "", "is_final": result.is_final, "stability": result.stability,
+                "word_confidences": [], "word_timings": []
+            }
+
+        alternative = result.alternatives[0]
+        word_timings = self._word_timings(alternative) if result.is_final else []
+
+        return {
+            "transcript": alternative.transcript,
+            "is_final": result.is_final,
+            "stability": result.stability,
+            "word_confidences": [(word, confidence) for word, confidence, _, _ in word_timings],
+            "word_timings": word_timings
+        }
+
+    @staticmethod
+    def _word_timings(alternative) -> List[Tuple[str, float, float, float]]:
+        # start_time / end_time are offsets from the beginning of the audio
+        return [
+            (
+                word_info.word,
+                word_info.confidence,
+                word_info.start_time.total_seconds(),
+                word_info.end_time.total_seconds()
+            ) for word_info in alternative.words
+        ]
+
 speech_service = SpeechService()
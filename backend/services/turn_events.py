@@ -0,0 +1,275 @@
+import asyncio
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Set
+from bson import ObjectId
+from pydantic import BaseModel, Field
+from core.cache import LRUSet
+from core.config import settings
+from database.models import ConversationHistoryModel, ErrorDetail, UserModel
+from database.repositories import ConversationRepository, ProgressRepository, UserRepository
+from services.gamification_service import gamification_service
+
+
+class TurnCompleted(BaseModel):
+    """A learner turn that has been answered and now needs to be recorded"""
+    # Also the conversation's _id, so re-applying the event can't store it twice
+    event_id: str = Field(default_factory=lambda: str(ObjectId()))
+    user_id: str
+    user: Optional[UserModel] = None  # Profile to create the user from if it doesn't exist yet
+    transcript: str
+    analysis: Dict
+    pronunciation_score: float
+    problematic_phonemes: List[str] = []
+    word_confidences: List = []
+    word_timings: List = []  # (word, confidence, start_seconds, end_seconds)
+    phoneme_scores: Dict[str, float] = {}
+    personality: str = "friendly"
+    session_duration_seconds: float = 0.0
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class TurnEventPipeline:
+    """
+    In-process background pipeline for everything a turn changes in MongoDB
+    (history, progress, streaks, points, achievements), so none of it sits on
+    the response path. Events go into a bounded queue and a worker applies
+    them in batches with insert_many / bulk_write. The lifespan hook drains
+    the queue on shutdown.
+
+    A batch is applied as separate writes (history, progress, then creating
+    the user if needed, streak, points and achievements per user). When one fails the batch is retried
+    with backoff, skipping the writes that already went through, so a retry
+    doesn't award points twice. The rollup and progress bulk writes can fail
+    part way, so each of their updates also records the batch id and skips
+    itself when it is already there.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        batch_size: int,
+        linger_seconds: float,
+        max_attempts: int = 1,
+        retry_backoff_seconds: float = 0.0
+    ):
+        self.batch_size = batch_size
+        self.linger_seconds = linger_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._worker: Optional[asyncio.Task] = None
+        self._accepting = True
+        # Users known to exist - checked before touching Mongo
+        self._known_users = LRUSet(maxsize=settings.KNOWN_USERS_CACHE_SIZE)
+        self.processed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.retried = 0
+
+    def publish(self, event: TurnCompleted) -> bool:
+        """
+        Enqueues an event without waiting. When the queue is full the event is
+        dropped (and counted) rather than slowing down the conversation.
+        """
+        if not self._accepting:
+            self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            print(f"WARNING: turn event queue full, dropped event for {event.user_id}")
+            return False
+
+    def start(self):
+        if self._worker is None:
+            self._accepting = True
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float):
+        """Stops accepting events and waits (up to timeout) for queued ones to be applied"""
+        if self._worker is None:
+            return
+        self._accepting = False
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"WARNING: {self._queue.qsize()} turn events not applied before shutdown")
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    def stats(self) -> Dict:
+        return {
+            "queued": self._queue.qsize(),
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "retried": self.retried
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.linger_seconds
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._apply_with_retries(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _apply_with_retries(self, events: List[TurnCompleted]):
+        done: Set[Hashable] = set()
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await self._apply(events, done)
+                self.processed += len(events)
+                return
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    self.failed += len(events)
+                    print(f"Error applying {len(events)} turn events, giving up after {attempt} attempts: {e}")
+                    self._log_lost(events, done)
+                    return
+                delay = self.retry_backoff_seconds * 2 ** (attempt - 1)
+                self.retried += 1
+                print(f"Error applying {len(events)} turn events (attempt {attempt}), retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    def _log_lost(events: List[TurnCompleted], done: Set[Hashable]):
+        for event in events:
+            pending = [
+                step for step in ("history", "rollups", "progress")
+                if step not in done
+            ] + [
+                step for step in ("user", "streak", "points", "achievements")
+                if (event.user_id, step) not in done
+            ]
+            print(
+                f"LOST turn event {event.event_id} for {event.user_id}: not applied: {', '.join(pending)} "
+                f"(score={event.pronunciation_score}, errors={len(event.analysis.get('errors', []))}, "
+                f"at={event.created_at.isoformat()})"
+            )
+
+    @staticmethod
+    async def _step(done: Set[Hashable], key: Hashable, write: Callable[[], Awaitable]):
+        # Each write runs until it succeeds once; retries skip it afterwards
+        if key not in done:
+            await write()
+            done.add(key)
+
+    async def _apply(self, events: List[TurnCompleted], done: Set[Hashable]):
+        # The first event's id identifies the batch, so a retry's writes recognize
+        # the ones that already went through
+        batch_id = events[0].event_id
+        conversations = [self._conversation(event) for event in events]
+
+        # 1. History, then the daily error rollups of the whole batch
+        await self._step(done, "history", lambda: ConversationRepository.save_conversations(conversations))
+        await self._step(done, "rollups", lambda: ConversationRepository.record_error_rollups(batch_id, conversations))
+
+        # 2. Progress for every user in the batch in one bulk write
+        events_by_user: Dict[str, List[TurnCompleted]] = {}
+        for event in events:
+            events_by_user.setdefault(event.user_id, []).append(event)
+        await self._step(done, "progress", lambda: ProgressRepository.record_turns(batch_id, {
+            user_id: {
+                "conversations": len(user_events),
+                "phoneme_scores": [
+                    (phoneme, event.phoneme_scores.get(phoneme, event.pronunciation_score))
+                    for event in user_events for phoneme in event.problematic_phonemes
+                ]
+            }
+            for user_id, user_events in events_by_user.items()
+        }))
+
+        # 3. Streaks, points and achievements - users are independent of each other,
+        # so one user's failure doesn't hold back (or re-run) the others
+        results = await asyncio.gather(*(
+            self._apply_gamification(user_id, user_events, done)
+            for user_id, user_events in events_by_user.items()
+        ), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
+    async def _apply_gamification(self, user_id: str, events: List[TurnCompleted], done: Set[Hashable]):
+        # Streak and points updates need the user document
+        await self._step(done, (user_id, "user"), lambda: self._ensure_user(events))
+        await self._step(done, (user_id, "streak"), lambda: gamification_service.update_user_streak(user_id))
+
+        points = 0
+        for event in events:
+            points += await gamification_service.calculate_conversation_points(
+                event.pronunciation_score,
+                len(event.analysis.get("errors", [])),
+                event.session_duration_seconds
+            )
+        await self._step(done, (user_id, "points"), lambda: UserRepository.increment_points(user_id, points))
+
+        await self._step(done, (user_id, "achievements"), lambda: gamification_service.check_and_award_achievements(user_id, {
+            "pronunciation_score": max(event.pronunciation_score for event in events),
+            "error_count": min(len(event.analysis.get("errors", [])) for event in events)
+        }))
+
+    async def _ensure_user(self, events: List[TurnCompleted]):
+        user = next((event.user for event in events if event.user is not None), None)
+        if user is None or user.firebase_uid in self._known_users:
+            return
+        await UserRepository.ensure_user(user)
+        self._known_users.add(user.firebase_uid)
+
+    @staticmethod
+    def _conversation(event: TurnCompleted) -> ConversationHistoryModel:
+        analysis = event.analysis
+        return ConversationHistoryModel(
+            id=event.event_id,
+            user_id=event.user_id,
+            transcript=event.transcript,
+            corrected_sentence=analysis.get("corrected_sentence") or event.transcript,
+            errors=[
+                ErrorDetail(
+                    error_type=error.get("type", "other"),
+                    incorrect_word=error.get("incorrect", ""),
+                    correct_word=error.get("correct", ""),
+                    explanation=error.get("explanation", "")
+                ) for error in analysis.get("errors", []) if isinstance(error, dict)
+            ],
+            learning_tip=analysis.get("learning_tip", ""),
+            follow_up_question=analysis.get("follow_up_question", ""),
+            feedback_tone=analysis.get("feedback_tone", event.personality),
+            detected_emotion=analysis.get("detected_emotion"),
+            emotional_feedback=analysis.get("emotional_feedback"),
+            pronunciation_score=event.pronunciation_score,
+            word_confidence_scores={word: confidence for word, confidence, *_ in event.word_confidences},
+            word_timings=[tuple(timing) for timing in event.word_timings] or None,
+            problematic_phonemes=event.problematic_phonemes,
+            cultural_context=analysis.get("cultural_context"),
+            ai_personality_used=event.personality,
+            session_duration_seconds=event.session_duration_seconds,
+            created_at=event.created_at
+        )
+
+
+turn_events = TurnEventPipeline(
+    maxsize=settings.TURN_EVENT_QUEUE_SIZE,
+    batch_size=settings.TURN_EVENT_BATCH_SIZE,
+    linger_seconds=settings.TURN_EVENT_LINGER_MS / 1000,
+    max_attempts=settings.TURN_EVENT_MAX_ATTEMPTS,
+    retry_backoff_seconds=settings.TURN_EVENT_RETRY_BACKOFF_MS / 1000
+)
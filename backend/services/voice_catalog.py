@@ -0,0 +1,86 @@
+import asyncio
+import hashlib
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+from core.cache import SingleFlight
+from core.config import settings
+from core.executors import run_blocking
+from services.elevenlabs_service import elevenlabs_service
+
+
+class VoiceCatalog:
+    """
+    Process-wide copy of the voice list, refreshed by a background task.
+    Reads never wait on ElevenLabs once the catalog is loaded: a stale catalog
+    is served while a refresh runs (stale-while-revalidate), and a failed
+    refresh keeps the last good catalog. After a failure the next refresh is
+    due after retry_seconds rather than the full ttl, so a startup blip doesn't
+    pin the built-in fallback list for an hour.
+    """
+
+    def __init__(self, ttl: float, retry_seconds: float):
+        self.ttl = ttl
+        self.retry_seconds = retry_seconds
+        self._voices: Optional[List[Dict]] = None
+        self._etag: Optional[str] = None
+        self._refresh_due = 0.0
+        self._refreshing = SingleFlight()
+        self._refresher: Optional[asyncio.Task] = None
+
+    @property
+    def is_stale(self) -> bool:
+        return time.monotonic() >= self._refresh_due
+
+    async def get(self) -> Tuple[List[Dict], str]:
+        """Returns (voices, etag)"""
+        if self._voices is None:
+            await self.refresh()
+        elif self.is_stale:
+            asyncio.ensure_future(self.refresh())
+        return self._voices, self._etag
+
+    async def refresh(self):
+        await self._refreshing.do("voices", self._refresh)
+
+    async def _refresh(self):
+        try:
+            voices = await run_blocking("tts", elevenlabs_service.fetch_voices)
+        except Exception as e:
+            print(f"Error refreshing voice catalog, retrying in {self.retry_seconds:.0f}s: {e}")
+            self._refresh_due = time.monotonic() + self.retry_seconds
+            if self._voices is None:
+                # Serve the built-in list meanwhile, without marking it fresh
+                self._set(elevenlabs_service.fallback_voices())
+            return  # Otherwise keep serving the last good catalog
+        self._set(voices)
+        self._refresh_due = time.monotonic() + self.ttl
+
+    def _set(self, voices: List[Dict]):
+        body = json.dumps(voices, sort_keys=True).encode("utf-8")
+        self._voices = voices
+        self._etag = f'"{hashlib.sha1(body).hexdigest()}"'
+
+    async def _refresh_forever(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(max(self._refresh_due - time.monotonic(), 0.0))
+
+    def start(self):
+        if self._refresher is None:
+            self._refresher = asyncio.create_task(self._refresh_forever())
+
+    async def stop(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+
+
+voice_catalog = VoiceCatalog(
+    ttl=settings.VOICE_CATALOG_TTL_SECONDS,
+    retry_seconds=settings.VOICE_CATALOG_RETRY_SECONDS
+)
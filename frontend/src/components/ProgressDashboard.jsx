@@ -62,6 +62,9 @@ const ProgressDashboard = () => {
                         <div>
                             <p className="text-sm opacity-90">Global Rank</p>
                             <p className="text-3xl font-bold">#{stats.user.rank || 'N/A'}</p>
+                            {stats.user.percentile != null && (
+                                <p className="text-sm opacity-90">Top {stats.user.percentile}%</p>
+                            )}
                         </div>
                         <TrendingUp className="w-12 h-12 opacity-80" />
                     </div>
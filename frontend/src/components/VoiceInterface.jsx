@@ -59,7 +59,8 @@ const VoiceInterface = ({ personality = 'friendly', userLevel = 'intermediate',
                 : (import.meta.env.VITE_API_URL || '');
 
             // Construct URL with query parameters
-            let url = `${apiUrl}/api/v1/conversation/audio?personality=${personality}&user_level=${userLevel}`;
+            // Stream mode: the reply audio is fetched from audio_url and starts playing while it is synthesized
+            let url = `${apiUrl}/api/v1/conversation/audio?personality=${personality}&user_level=${userLevel}&response_mode=stream`;
             if (voiceId) {
                 url += `&voice_id=${voiceId}`;
             }
@@ -81,7 +82,10 @@ const VoiceInterface = ({ personality = 'friendly', userLevel = 'intermediate',
             setPronunciation(response.data.pronunciation);
 
             // Play returned audio or fallback
-            if (response.data.audio_base64) {
+            if (response.data.audio_url) {
+                const audio = new Audio(`${apiUrl}${response.data.audio_url}`);
+                audio.play();
+            } else if (response.data.audio_base64) {
                 const audioSrc = `data:audio/mp3;base64,${response.data.audio_base64}`;
                 const audio = new Audio(audioSrc);
                 audio.play();